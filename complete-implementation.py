@@ -14,16 +14,31 @@ Date: November 2025
 """
 
 import os
+import re
+import asyncio
+import copy
 import logging
 import json
+import time
+import uuid
+import zlib
+import threading
+import heapq
+import inspect
+import functools
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Callable
+import numpy as np
 from dotenv import load_dotenv
 
 # Google ADK imports
 from google.adk.agents import Agent
 from google.adk.tools import google_search, code_execution
 from google.adk.tools.function_tool import FunctionTool
+from google.adk.models import LLMRegistry
 from google.adk.orchestration import Runner
 from google.adk.orchestration.session import InMemorySessionService
 from google.generativeai.types import content_types
@@ -38,10 +53,132 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ============================================================================
+# TOOL RESULT MEMOIZATION
+# ============================================================================
+
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "1024"))
+
+
+class ToolResultCache:
+    """
+    Bounded LRU cache shared by all memoized tools, with per-tool statistics.
+    """
+
+    def __init__(self, maxsize: int = TOOL_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _tool_stats(self, tool_name: str) -> Dict[str, int]:
+        return self._stats.setdefault(tool_name, {"hits": 0, "misses": 0, "evictions": 0})
+
+    def get(self, tool_name: str, key: str) -> Optional[Any]:
+        """Return a cached result (and mark it recently used), or None."""
+        with self._lock:
+            entry = self._entries.get((tool_name, key))
+            if entry is None:
+                self._tool_stats(tool_name)["misses"] += 1
+                return None
+            self._entries.move_to_end((tool_name, key))
+            self._tool_stats(tool_name)["hits"] += 1
+            return entry
+
+    def put(self, tool_name: str, key: str, result: Any) -> None:
+        """Store a result, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[(tool_name, key)] = result
+            self._entries.move_to_end((tool_name, key))
+            while len(self._entries) > self.maxsize:
+                (evicted_tool, _), _ = self._entries.popitem(last=False)
+                self._tool_stats(evicted_tool)["evictions"] += 1
+
+    def clear(self) -> None:
+        """Drop every cached result (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-tool hits, misses, evictions and hit rate, plus current size."""
+        with self._lock:
+            report = {"size": len(self._entries), "maxsize": self.maxsize, "tools": {}}
+            for tool_name, stats in self._stats.items():
+                lookups = stats["hits"] + stats["misses"]
+                report["tools"][tool_name] = {
+                    **stats,
+                    "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0
+                }
+            return report
+
+
+tool_result_cache = ToolResultCache()
+
+
+def memoized_tool(
+    key_args: List[str],
+    timestamp_fields: Optional[List[str]] = None,
+    on_hit: Optional[Callable[[Dict[str, Any], Any], None]] = None
+):
+    """
+    Declare a tool pure in key_args and memoize it in tool_result_cache.
+
+    Args:
+        key_args: Arguments that fully determine the result
+        timestamp_fields: Result fields re-stamped with the current time on a hit
+        on_hit: Side effect that must still run on a hit, called with a
+            copy of the result and the tool_context (e.g. appending to session state)
+
+    Returns:
+        Decorator; the wrapped tool keeps its signature and docstring so
+        FunctionTool builds the same declaration
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = json.dumps([bound.arguments[name] for name in key_args], sort_keys=True, default=str)
+
+            cached = tool_result_cache.get(func.__name__, key)
+            if cached is None:
+                result = func(*args, **kwargs)
+                tool_result_cache.put(func.__name__, key, copy.deepcopy(result))
+                return result
+
+            result = copy.deepcopy(cached)
+            now = datetime.now().isoformat()
+            for field in timestamp_fields or []:
+                result[field] = now
+            tool_context = bound.arguments.get("tool_context")
+            if on_hit and tool_context and hasattr(tool_context, "state"):
+                on_hit(copy.deepcopy(result), tool_context)  # State must not alias the reply
+            logger.info(f"Tool cache hit: {func.__name__}")
+            return result
+
+        return wrapper
+    return decorator
+
 # ============================================================================
 # CUSTOM TOOLS IMPLEMENTATION
 # ============================================================================
 
+def _store_schedule(schedule: Dict[str, Any], tool_context) -> None:
+    """Append a schedule to session state."""
+    if 'study_schedules' not in tool_context.state:
+        tool_context.state['study_schedules'] = []
+    tool_context.state['study_schedules'].append(schedule)
+    _log_state_event(tool_context, "schedule_created", schedule)
+    logger.info("Study schedule saved to session state")
+
+
+@memoized_tool(
+    key_args=["subject", "hours_per_day", "duration_weeks", "deadline"],
+    timestamp_fields=["created_at"],
+    on_hit=_store_schedule
+)
 def create_study_schedule(
     subject: str,
     hours_per_day: int,
@@ -101,10 +238,7 @@ def create_study_schedule(
     
     # Store in session state if available
     if tool_context and hasattr(tool_context, 'state'):
-        if 'study_schedules' not in tool_context.state:
-            tool_context.state['study_schedules'] = []
-        tool_context.state['study_schedules'].append(schedule)
-        logger.info("Study schedule saved to session state")
+        _store_schedule(copy.deepcopy(schedule), tool_context)
     
     return schedule
 
@@ -157,10 +291,37 @@ def track_progress(
         if all_tasks:
             avg_completion = sum(t['completion_percentage'] for t in all_tasks.values()) / len(all_tasks)
             progress_entry['overall_progress'] = f"{avg_completion:.1f}%"
+        
+        _log_state_event(tool_context, "progress_updated", progress_entry)
+
+        # Keep class-wide dashboards current
+        educator_analytics.record_progress(
+            _student_id(tool_context), task_id, status,
+            progress_entry['completion_percentage'],
+            cohort_id=tool_context.state.get('cohort_id')
+        )
     
     return progress_entry
 
 
+def _store_wellness(assessment: Dict[str, Any], tool_context) -> None:
+    """Append an assessment to session state and the educator analytics."""
+    if 'wellness_history' not in tool_context.state:
+        tool_context.state['wellness_history'] = []
+    tool_context.state['wellness_history'].append(assessment)
+    _log_state_event(tool_context, "wellness_assessed", assessment)
+    educator_analytics.record_wellness(
+        _student_id(tool_context), assessment['overall_status'],
+        assessment['wellness_score'],
+        cohort_id=tool_context.state.get('cohort_id')
+    )
+
+
+@memoized_tool(
+    key_args=["stress_level", "sleep_hours", "exercise_frequency"],
+    timestamp_fields=["assessed_at"],
+    on_hit=_store_wellness
+)
 def assess_wellness(
     stress_level: int,
     sleep_hours: float,
@@ -236,88 +397,1646 @@ def assess_wellness(
     
     # Store in session state
     if tool_context and hasattr(tool_context, 'state'):
-        if 'wellness_history' not in tool_context.state:
-            tool_context.state['wellness_history'] = []
-        tool_context.state['wellness_history'].append(assessment)
+        _store_wellness(copy.deepcopy(assessment), tool_context)
     
     return assessment
 
 
-def recommend_resources(
-    topic: str,
-    difficulty_level: str,
-    resource_types: List[str],
-    tool_context=None
-) -> Dict[str, Any]:
+@memoized_tool(
+    key_args=["topic", "difficulty_level", "resource_types"],
+    timestamp_fields=["generated_at"]
+)
+def recommend_resources(
+    topic: str,
+    difficulty_level: str,
+    resource_types: List[str],
+    tool_context=None
+) -> Dict[str, Any]:
+    """
+    Custom tool to recommend curated educational resources.
+    
+    Args:
+        topic: Learning topic
+        difficulty_level: beginner, intermediate, advanced
+        resource_types: List of types (video, article, tutorial, book, course)
+        tool_context: ADK tool context
+        
+    Returns:
+        Curated resource recommendations
+    """
+    logger.info(f"Recommending resources for: {topic} ({difficulty_level})")
+    
+    # Simulated resource database (in production, would query real database)
+    resource_db = {
+        "beginner": {
+            "video": ["YouTube tutorials", "Khan Academy videos", "Coursera beginner courses"],
+            "article": ["GeeksforGeeks basics", "TutorialsPoint introductions", "W3Schools guides"],
+            "tutorial": ["freeCodeCamp", "Codecademy interactive lessons", "Udemy beginner tracks"],
+            "book": ["Head First series", "For Dummies series", "Visual QuickStart guides"],
+            "course": ["Coursera Specializations", "edX MicroMasters", "Udacity Nanodegrees"]
+        },
+        "intermediate": {
+            "video": ["MIT OpenCourseWare", "Stanford Online", "Pluralsight intermediate"],
+            "article": ["Medium deep-dives", "Dev.to technical posts", "HackerNoon guides"],
+            "tutorial": ["Real Python", "The Odin Project", "FullStackOpen"],
+            "book": ["O'Reilly books", "Apress technical books", "Manning Publications"],
+            "course": ["Advanced Coursera courses", "LinkedIn Learning paths", "Frontend Masters"]
+        },
+        "advanced": {
+            "video": ["Conference talks", "Research presentations", "Advanced Udemy courses"],
+            "article": ["Research papers", "IEEE publications", "ACM Digital Library"],
+            "tutorial": ["Official documentation", "GitHub advanced guides", "Awesome lists"],
+            "book": ["Academic textbooks", "Domain-specific monographs", "Research compilations"],
+            "course": ["Graduate-level MOOCs", "Specialized certifications", "Expert masterclasses"]
+        }
+    }
+    
+    level = difficulty_level.lower() if difficulty_level.lower() in resource_db else "intermediate"
+    
+    recommendations = {
+        "topic": topic,
+        "difficulty_level": level,
+        "resources": {}
+    }
+    
+    for res_type in resource_types:
+        if res_type in resource_db[level]:
+            recommendations["resources"][res_type] = resource_db[level][res_type]
+    
+    recommendations["search_queries"] = [
+        f"{topic} {level} tutorial",
+        f"best {topic} resources for {level}",
+        f"{topic} {level} projects"
+    ]
+    
+    recommendations["generated_at"] = datetime.now().isoformat()
+    
+    return recommendations
+
+
+def _student_id(tool_context) -> str:
+    """Student the current tool call belongs to (set in session state by run_turn)."""
+    return tool_context.state.get("user_id") or "anonymous"
+
+
+# Create FunctionTool instances for each custom tool
+schedule_creator_tool = FunctionTool(create_study_schedule)
+progress_tracker_tool = FunctionTool(track_progress)
+wellness_check_tool = FunctionTool(assess_wellness)
+resource_recommender_tool = FunctionTool(recommend_resources)
+
+logger.info("Custom tools initialized: schedule_creator, progress_tracker, wellness_check, resource_recommender")
+
+# ============================================================================
+# EDUCATOR ANALYTICS (INCREMENTAL COHORT VIEWS)
+# ============================================================================
+
+# overall_progress histogram buckets: 0-20%, 20-40%, 40-60%, 60-80%, 80-100%
+PROGRESS_BUCKETS = ["0-20", "20-40", "40-60", "60-80", "80-100"]
+WELLNESS_STATUSES = ["good", "needs_attention", "critical"]
+
+ALL_STUDENTS = "all"
+
+
+def _progress_bucket(overall_progress: float) -> int:
+    """Histogram bucket index for an overall progress percentage."""
+    return min(int(overall_progress // 20), len(PROGRESS_BUCKETS) - 1)
+
+
+def _empty_cohort_view() -> Dict[str, Any]:
+    """Running totals for one cohort, all starting at zero."""
+    return {
+        "students_with_progress": 0,
+        "progress_sum": 0.0,
+        "progress_buckets": [0] * len(PROGRESS_BUCKETS),
+        "students_assessed": 0,
+        "wellness_score_sum": 0.0,
+        "wellness_counts": {status: 0 for status in WELLNESS_STATUSES},
+        "blocked_tasks": {}
+    }
+
+
+class EducatorAnalytics:
+    """
+    Materialized class-wide views of progress and wellness.
+
+    The tools call record_progress/record_wellness on every write, and each
+    call adjusts the running totals of the "all" view and the student's
+    cohort view by the difference it makes. Queries only read those totals,
+    so their cost does not depend on how many students there are.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._views: Dict[str, Dict[str, Any]] = {ALL_STUDENTS: _empty_cohort_view()}
+        self._student_cohort: Dict[str, str] = {}
+        self._student_tasks: Dict[str, Dict[str, Tuple[str, int]]] = {}
+        self._student_progress: Dict[str, float] = {}
+        self._student_wellness: Dict[str, Tuple[str, float]] = {}
+
+    def _views_for(self, student_id: str, cohort_id: Optional[str]) -> List[Dict[str, Any]]:
+        """Views a student's writes apply to; the cohort is fixed by the first write."""
+        cohort = self._student_cohort.setdefault(student_id, cohort_id or ALL_STUDENTS)
+        views = [self._views[ALL_STUDENTS]]
+        if cohort != ALL_STUDENTS:
+            views.append(self._views.setdefault(cohort, _empty_cohort_view()))
+        return views
+
+    def record_progress(
+        self,
+        student_id: str,
+        task_id: str,
+        status: str,
+        completion_percentage: int,
+        cohort_id: Optional[str] = None
+    ) -> None:
+        """
+        Apply one progress_tracking write to the views.
+
+        Args:
+            student_id: Student who updated the task
+            task_id: Task identifier
+            status: New task status
+            completion_percentage: New task completion (0-100)
+            cohort_id: Class or group the student belongs to
+        """
+        with self._lock:
+            tasks = self._student_tasks.setdefault(student_id, {})
+            old_status, old_pct = tasks.get(task_id, (None, 0))
+            old_overall = self._student_progress.get(student_id)
+
+            task_count = len(tasks) + (task_id not in tasks)
+            total = (old_overall or 0.0) * len(tasks) - old_pct + completion_percentage
+            new_overall = total / task_count
+            tasks[task_id] = (status, completion_percentage)
+            self._student_progress[student_id] = new_overall
+
+            for view in self._views_for(student_id, cohort_id):
+                if old_overall is None:
+                    view["students_with_progress"] += 1
+                else:
+                    view["progress_sum"] -= old_overall
+                    view["progress_buckets"][_progress_bucket(old_overall)] -= 1
+                view["progress_sum"] += new_overall
+                view["progress_buckets"][_progress_bucket(new_overall)] += 1
+
+                blocked = view["blocked_tasks"]
+                if old_status == "blocked":
+                    blocked[task_id] -= 1
+                    if not blocked[task_id]:
+                        del blocked[task_id]
+                if status == "blocked":
+                    blocked[task_id] = blocked.get(task_id, 0) + 1
+
+    def record_wellness(
+        self,
+        student_id: str,
+        overall_status: str,
+        wellness_score: float,
+        cohort_id: Optional[str] = None
+    ) -> None:
+        """
+        Apply one wellness assessment; only a student's latest one counts.
+
+        Args:
+            student_id: Assessed student
+            overall_status: good, needs_attention or critical
+            wellness_score: Score from 0 to 100
+            cohort_id: Class or group the student belongs to
+        """
+        with self._lock:
+            previous = self._student_wellness.get(student_id)
+            self._student_wellness[student_id] = (overall_status, wellness_score)
+
+            for view in self._views_for(student_id, cohort_id):
+                if previous is None:
+                    view["students_assessed"] += 1
+                else:
+                    view["wellness_counts"][previous[0]] -= 1
+                    view["wellness_score_sum"] -= previous[1]
+                view["wellness_counts"][overall_status] += 1
+                view["wellness_score_sum"] += wellness_score
+
+    def rebuild_from_log(self, log: "SessionEventLog") -> int:
+        """
+        Rebuild the views from every logged session, e.g. at startup.
+
+        Each student's latest entry per task and latest wellness assessment
+        across all their sessions are applied in timestamp order.
+
+        Args:
+            log: Session event log to read
+
+        Returns:
+            Number of sessions read
+        """
+        progress: Dict[Tuple[str, str], Tuple[Dict[str, Any], Optional[str]]] = {}
+        wellness: Dict[str, Tuple[Dict[str, Any], Optional[str]]] = {}
+        sessions = 0
+
+        for user_id, _session_id, state in log.states():
+            cohort_id = state.get("cohort_id")
+            for task_id, entry in state.get("progress_tracking", {}).items():
+                latest = progress.get((user_id, task_id))
+                if latest is None or entry["timestamp"] >= latest[0]["timestamp"]:
+                    progress[(user_id, task_id)] = (entry, cohort_id)
+            for entry in state.get("wellness_history", [])[-1:]:
+                latest = wellness.get(user_id)
+                if latest is None or entry["assessed_at"] >= latest[0]["assessed_at"]:
+                    wellness[user_id] = (entry, cohort_id)
+            sessions += 1
+
+        with self._lock:
+            self._reset()
+        for (user_id, task_id), (entry, cohort_id) in sorted(
+            progress.items(), key=lambda item: item[1][0]["timestamp"]
+        ):
+            self.record_progress(
+                user_id, task_id, entry["status"], entry["completion_percentage"], cohort_id
+            )
+        for user_id, (entry, cohort_id) in wellness.items():
+            self.record_wellness(user_id, entry["overall_status"], entry["wellness_score"], cohort_id)
+
+        logger.info(f"Educator analytics rebuilt from {sessions} logged sessions")
+        return sessions
+
+    def progress_distribution(self, cohort_id: str = ALL_STUDENTS) -> Dict[str, Any]:
+        """Histogram and mean of students' overall_progress."""
+        view = self._views.get(cohort_id, _empty_cohort_view())
+        with self._lock:
+            students = view["students_with_progress"]
+            return {
+                "students": students,
+                "average_progress": round(view["progress_sum"] / students, 1) if students else 0.0,
+                "buckets": dict(zip(PROGRESS_BUCKETS, view["progress_buckets"]))
+            }
+
+    def wellness_breakdown(self, cohort_id: str = ALL_STUDENTS) -> Dict[str, Any]:
+        """Share of students in each wellness status, by latest assessment."""
+        view = self._views.get(cohort_id, _empty_cohort_view())
+        with self._lock:
+            assessed = view["students_assessed"]
+            return {
+                "students_assessed": assessed,
+                "average_score": round(view["wellness_score_sum"] / assessed, 1) if assessed else 0.0,
+                "counts": dict(view["wellness_counts"]),
+                "shares": {
+                    status: round(count / assessed, 3) if assessed else 0.0
+                    for status, count in view["wellness_counts"].items()
+                }
+            }
+
+    def critical_share(self, cohort_id: str = ALL_STUDENTS) -> float:
+        """Fraction of assessed students whose latest status is critical."""
+        return self.wellness_breakdown(cohort_id)["shares"]["critical"]
+
+    def blocked_hotspots(self, cohort_id: str = ALL_STUDENTS, top_n: int = 5) -> List[Dict[str, Any]]:
+        """Tasks with the most students currently blocked on them."""
+        view = self._views.get(cohort_id, _empty_cohort_view())
+        with self._lock:
+            ranked = heapq.nlargest(top_n, view["blocked_tasks"].items(), key=lambda item: item[1])
+        return [{"task_id": task_id, "blocked_students": count} for task_id, count in ranked]
+
+    def cohort_summary(self, cohort_id: str = ALL_STUDENTS) -> Dict[str, Any]:
+        """Everything an educator dashboard shows for one cohort."""
+        return {
+            "cohort_id": cohort_id,
+            "progress": self.progress_distribution(cohort_id),
+            "wellness": self.wellness_breakdown(cohort_id),
+            "blocked_hotspots": self.blocked_hotspots(cohort_id)
+        }
+
+
+educator_analytics = EducatorAnalytics()
+
+# ============================================================================
+# EVENT-SOURCED SESSION LOG
+# ============================================================================
+
+SESSION_LOG_DIR = os.getenv("SESSION_LOG_DIR", "session_logs")
+SESSION_SNAPSHOT_EVERY = int(os.getenv("SESSION_SNAPSHOT_EVERY", "50"))
+SESSION_LOG_CACHE_SIZE = int(os.getenv("SESSION_LOG_CACHE_SIZE", "256"))
+
+
+def apply_session_event(state: Dict[str, Any], event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply one logged mutation to a session state dict (the log's reducer).
+
+    Args:
+        state: State to update in place
+        event: Event record with "type" and "payload"
+
+    Returns:
+        The same state, for chaining
+    """
+    event_type, payload = event["type"], event["payload"]
+
+    if event_type == "session_created":
+        state.update(copy.deepcopy(payload))
+    elif event_type == "schedule_created":
+        state.setdefault("study_schedules", []).append(payload)
+    elif event_type == "progress_updated":
+        state.setdefault("progress_tracking", {})[payload["task_id"]] = payload
+    elif event_type == "wellness_assessed":
+        state.setdefault("wellness_history", []).append(payload)
+    else:
+        logger.warning(f"Unknown session event type: {event_type}")
+    return state
+
+
+class SessionEventLog:
+    """
+    Append-only log of session state mutations with periodic snapshots.
+
+    Each session has a directory holding meta.json (its ids),
+    events.jsonl (the active log tail) and snapshot.json. Every snapshot_every events the materialized
+    state is written to snapshot.json and the active log is rolled into
+    segments/, so recovery reads one snapshot plus a short tail while the
+    full history stays available for offline replay. Only the most
+    recently used sessions stay materialized in memory; others are
+    recovered from disk when they are next touched.
+    """
+
+    def __init__(
+        self,
+        directory: str = SESSION_LOG_DIR,
+        snapshot_every: int = SESSION_SNAPSHOT_EVERY,
+        max_cached_sessions: int = SESSION_LOG_CACHE_SIZE
+    ):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.max_cached_sessions = max_cached_sessions
+        self._states: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._seq: Dict[str, int] = {}
+        self._tail_start: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _session_dir(self, user_id: str, session_id: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{user_id}__{session_id}")
+        return os.path.join(self.directory, safe)
+
+    def _open(self, key: str, session_dir: str) -> None:
+        """Load a session into memory on first use (caller holds the lock)."""
+        if key in self._states:
+            self._states.move_to_end(key)
+            return
+        state, seq, tail_start = self._recover(session_dir)
+        self._states[key] = state
+        self._seq[key] = seq
+        # events.jsonl may already hold events from before the restart
+        self._tail_start[key] = tail_start if tail_start is not None else seq + 1
+
+        while len(self._states) > self.max_cached_sessions:
+            evicted, _ = self._states.popitem(last=False)
+            del self._seq[evicted], self._tail_start[evicted]
+
+    def append(self, user_id: str, session_id: str, event_type: str, payload: Dict[str, Any]) -> int:
+        """
+        Log one mutation, snapshotting when the tail is long enough.
+
+        Args:
+            user_id: Student identifier
+            session_id: Session identifier
+            event_type: session_created, schedule_created, progress_updated or wellness_assessed
+            payload: Mutation data (copied on write)
+
+        Returns:
+            Sequence number of the event
+        """
+        session_dir = self._session_dir(user_id, session_id)
+        key = session_dir
+
+        with self._lock:
+            self._open(key, session_dir)
+            if not os.path.exists(os.path.join(session_dir, "meta.json")):
+                os.makedirs(session_dir, exist_ok=True)
+                with open(os.path.join(session_dir, "meta.json"), "w", encoding="utf-8") as f:
+                    json.dump({"user_id": user_id, "session_id": session_id}, f)
+
+            seq = self._seq[key] + 1
+            event = {
+                "seq": seq,
+                "type": event_type,
+                "payload": payload,
+                "recorded_at": datetime.now().isoformat()
+            }
+            line = json.dumps(event, default=str)
+            with open(os.path.join(session_dir, "events.jsonl"), "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+            self._seq[key] = seq
+            apply_session_event(self._states[key], json.loads(line))
+
+            if seq - self._tail_start[key] + 1 >= self.snapshot_every:
+                self._snapshot(key, session_dir)
+        return seq
+
+    def _snapshot(self, key: str, session_dir: str) -> None:
+        """Write snapshot.json and roll the active log into segments/ (caller holds the lock)."""
+        seq = self._seq[key]
+        snapshot_path = os.path.join(session_dir, "snapshot.json")
+        with open(snapshot_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"seq": seq, "state": self._states[key]}, f, default=str)
+        os.replace(snapshot_path + ".tmp", snapshot_path)
+
+        segments_dir = os.path.join(session_dir, "segments")
+        os.makedirs(segments_dir, exist_ok=True)
+        os.replace(
+            os.path.join(session_dir, "events.jsonl"),
+            os.path.join(segments_dir, f"events-{self._tail_start[key]:08d}-{seq:08d}.jsonl")
+        )
+        self._tail_start[key] = seq + 1
+        logger.info(f"Session snapshot written at seq {seq}: {session_dir}")
+
+    @staticmethod
+    def _read_events(path: str) -> List[Dict[str, Any]]:
+        """Read a log file, ignoring a torn final line from a crash mid-write."""
+        if not os.path.exists(path):
+            return []
+        events = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable event in {path}")
+        return events
+
+    @staticmethod
+    def _truncate_torn_tail(path: str) -> None:
+        """Cut a partial last line so new events are not appended onto it."""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def _recover(self, session_dir: str) -> Tuple[Dict[str, Any], int, Optional[int]]:
+        """
+        Rebuild state from the latest snapshot plus the log tail.
+
+        Returns:
+            (state, last seq, first seq in events.jsonl or None if it is empty)
+        """
+        state, seq, tail_start = {}, 0, None
+        snapshot_path = os.path.join(session_dir, "snapshot.json")
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            state, seq = snapshot["state"], snapshot["seq"]
+
+        tail_path = os.path.join(session_dir, "events.jsonl")
+        self._truncate_torn_tail(tail_path)
+        for event in self._read_events(tail_path):
+            if tail_start is None:
+                tail_start = event["seq"]
+            if event["seq"] > seq:
+                apply_session_event(state, event)
+                seq = event["seq"]
+        return state, seq, tail_start
+
+    def load(self, user_id: str, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Recover a session's state after a restart.
+
+        Args:
+            user_id: Student identifier
+            session_id: Session identifier
+
+        Returns:
+            Copy of the recovered state, or None if the session was never logged
+        """
+        session_dir = self._session_dir(user_id, session_id)
+        if not os.path.isdir(session_dir):
+            return None
+        with self._lock:
+            self._open(session_dir, session_dir)
+            return copy.deepcopy(self._states[session_dir])
+
+    def states(self):
+        """
+        Recover every logged session without keeping them all in memory.
+
+        Yields:
+            (user_id, session_id, state) triples; states must not be modified
+        """
+        if not os.path.isdir(self.directory):
+            return
+        for name in sorted(os.listdir(self.directory)):
+            session_dir = os.path.join(self.directory, name)
+            meta_path = os.path.join(session_dir, "meta.json")
+            if not os.path.exists(meta_path):
+                continue
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with self._lock:
+                state = self._states.get(session_dir) or self._recover(session_dir)[0]
+            yield meta["user_id"], meta["session_id"], state
+
+    def replay(self, user_id: str, session_id: str):
+        """
+        Replay a session's full history from the first event.
+
+        Args:
+            user_id: Student identifier
+            session_id: Session identifier
+
+        Yields:
+            (event, state after the event) pairs; the state object is reused
+        """
+        session_dir = self._session_dir(user_id, session_id)
+        segments_dir = os.path.join(session_dir, "segments")
+        paths = sorted(
+            os.path.join(segments_dir, name) for name in os.listdir(segments_dir)
+        ) if os.path.isdir(segments_dir) else []
+        paths.append(os.path.join(session_dir, "events.jsonl"))
+
+        state = {}
+        for path in paths:
+            for event in self._read_events(path):
+                yield event, apply_session_event(state, event)
+
+
+session_event_log = SessionEventLog()
+
+
+def _log_state_event(tool_context, event_type: str, payload: Dict[str, Any]) -> None:
+    """Log a tool's state mutation for the session it belongs to."""
+    session_id = tool_context.state.get("session_id")
+    if session_id:
+        session_event_log.append(_student_id(tool_context), session_id, event_type, payload)
+
+# ============================================================================
+# ADAPTIVE MODEL TIERING
+# ============================================================================
+
+# Model tiers, ordered from cheapest/fastest to strongest
+TIER_ORDER = ["lite", "standard", "pro"]
+
+MODEL_TIERS = {
+    "lite": os.getenv("MODEL_NAME_LITE", "gemini-2.0-flash-lite"),
+    "standard": os.getenv("MODEL_NAME", "gemini-2.0-flash-exp"),
+    "pro": os.getenv("MODEL_NAME_PRO", "gemini-2.5-pro")
+}
+
+# Expected latency per model call and cost relative to the lite tier
+TIER_PROFILES = {
+    "lite": {"latency_ms": 600, "relative_cost": 1.0},
+    "standard": {"latency_ms": 1200, "relative_cost": 2.5},
+    "pro": {"latency_ms": 4000, "relative_cost": 12.0}
+}
+
+# Service level objective for a single model call
+LATENCY_SLO_MS = int(os.getenv("LATENCY_SLO_MS", "5000"))
+COST_SLO = float(os.getenv("COST_SLO", "12.0"))
+
+# Lowest and highest tier each agent may run on
+AGENT_TIER_POLICY = {
+    "coordinator_agent": ("lite", "standard"),        # Routing is cheap
+    "learning_assistant_agent": ("standard", "pro"),  # Deep explanations
+    "study_planner_agent": ("lite", "pro"),
+    "wellness_coach_agent": ("standard", "pro"),      # Never the weakest model for wellbeing
+    "resource_finder_agent": ("lite", "standard")
+}
+
+# Phrases that signal multi-step reasoning is needed
+COMPLEX_QUERY_MARKERS = [
+    "step by step", "step-by-step", "prove", "derive", "compare", "analyze",
+    "analyse", "optimize", "time complexity", "why does", "why is", "debug",
+    "implement", "trade-off", "tradeoff", "in depth", "in detail"
+]
+
+# Phrases that indicate the model gave up on the answer
+REFUSAL_MARKERS = [
+    "i'm not sure", "i am not sure", "i cannot help", "i can't help",
+    "i don't know", "as an ai language model"
+]
+
+# Recent tiering decisions, exportable for the offline benchmark
+model_decision_log = deque(maxlen=10000)
+
+# Outgoing request per (invocation, agent), kept until its response is validated
+_pending_model_requests: Dict[Tuple[str, str], Any] = {}
+
+
+def estimate_query_complexity(query: str) -> float:
+    """
+    Estimate how demanding a query is on a 0.0 (trivial) to 1.0 (hard) scale.
+
+    Args:
+        query: Raw student message
+
+    Returns:
+        Complexity score rounded to two decimals
+    """
+    text = (query or "").lower()
+    words = text.split()
+
+    score = min(len(words) / 60, 1.0) * 0.4                      # Long messages
+    score += min(sum(1 for m in COMPLEX_QUERY_MARKERS if m in text), 3) * 0.15
+    score += min(text.count("?"), 3) * 0.05                      # Several questions
+    if "```" in text or "def " in text or "class " in text:     # Code to reason about
+        score += 0.2
+
+    return round(min(score, 1.0), 2)
+
+
+def select_model_tier(
+    agent_name: str,
+    complexity: float,
+    min_tier: Optional[str] = None,
+    slo_ms: Optional[int] = None,
+    cost_slo: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Pick the model tier for one agent call.
+
+    Args:
+        agent_name: Name of the agent about to call the model
+        complexity: Score from estimate_query_complexity for the current turn
+        min_tier: Tier to start from after a failed validation (escalation)
+        slo_ms: Latency budget per call, defaults to LATENCY_SLO_MS
+        cost_slo: Relative cost budget per call, defaults to COST_SLO
+
+    Returns:
+        Decision record with the chosen tier, model and the inputs used
+        (the student's message itself is never stored)
+    """
+    slo_ms = LATENCY_SLO_MS if slo_ms is None else slo_ms
+    cost_slo = COST_SLO if cost_slo is None else cost_slo
+    floor, ceiling = AGENT_TIER_POLICY.get(agent_name, ("standard", "standard"))
+    floor_idx, ceiling_idx = TIER_ORDER.index(floor), TIER_ORDER.index(ceiling)
+
+    desired_idx = 0 if complexity < 0.3 else 1 if complexity < 0.6 else 2
+    tier_idx = max(floor_idx, min(ceiling_idx, desired_idx))
+    reason = "complexity"
+
+    # Escalation overrides the SLO: a wrong cheap answer costs more than latency
+    if min_tier in TIER_ORDER and TIER_ORDER.index(min_tier) > tier_idx:
+        tier_idx = min(ceiling_idx, TIER_ORDER.index(min_tier))
+        reason = "escalation"
+    else:
+        while tier_idx > floor_idx:
+            profile = TIER_PROFILES[TIER_ORDER[tier_idx]]
+            if profile["latency_ms"] <= slo_ms and profile["relative_cost"] <= cost_slo:
+                break
+            tier_idx -= 1
+            reason = "slo"
+
+    tier = TIER_ORDER[tier_idx]
+    return {
+        "agent": agent_name,
+        "complexity": complexity,
+        "min_tier": min_tier,
+        "tier": tier,
+        "model": MODEL_TIERS[tier],
+        "reason": reason,
+        "slo_ms": slo_ms,
+        "cost_slo": cost_slo,
+        "estimated_latency_ms": TIER_PROFILES[tier]["latency_ms"],
+        "relative_cost": TIER_PROFILES[tier]["relative_cost"],
+        "decided_at": datetime.now().isoformat()
+    }
+
+
+def next_model_tier(agent_name: str, tier: str) -> Optional[str]:
+    """Return the next stronger tier allowed for the agent, or None at the ceiling."""
+    ceiling = AGENT_TIER_POLICY.get(agent_name, ("standard", "standard"))[1]
+    idx = TIER_ORDER.index(tier) if tier in TIER_ORDER else 0
+    if idx >= TIER_ORDER.index(ceiling):
+        return None
+    return TIER_ORDER[idx + 1]
+
+
+def validate_response(agent_name: str, response_text: str) -> List[str]:
+    """
+    Cheap checks that decide whether an answer needs a stronger model.
+
+    Args:
+        agent_name: Agent that produced the final answer
+        response_text: Final answer text
+
+    Returns:
+        List of validation issues (empty when the answer is acceptable)
+    """
+    issues = []
+    text = (response_text or "").strip()
+
+    if not text:
+        return ["empty_response"]
+
+    if agent_name != "coordinator_agent" and len(text) < 40:
+        issues.append("too_short")
+
+    lowered = text.lower()
+    if any(marker in lowered for marker in REFUSAL_MARKERS):
+        issues.append("uncertain_answer")
+
+    return issues
+
+
+def model_tier_callback(callback_context, llm_request):
+    """
+    ADK before_model_callback that swaps in the tier chosen for this call.
+
+    Args:
+        callback_context: ADK callback context (agent name and session state)
+        llm_request: Outgoing model request, updated in place
+
+    Returns:
+        None so the (re-targeted) request proceeds to the model
+    """
+    agent_name = getattr(callback_context, "agent_name", "")
+    state = getattr(callback_context, "state", None) or {}
+
+    decision = select_model_tier(
+        agent_name,
+        estimate_query_complexity(state.get("current_query", ""))
+    )
+    llm_request.model = decision["model"]
+    model_decision_log.append(decision)
+
+    # Kept so model_escalation_callback can re-ask this exact request
+    _pending_model_requests[(getattr(callback_context, "invocation_id", ""), agent_name)] = llm_request
+    while len(_pending_model_requests) > 1000:
+        _pending_model_requests.pop(next(iter(_pending_model_requests)))
+
+    state["last_model_tier"] = decision["tier"]
+    logger.info(f"Model tier for {agent_name}: {decision['tier']} ({decision['reason']})")
+    return None
+
+
+def _final_response_text(llm_response) -> Optional[str]:
+    """Answer text of a model response, or None if it is a tool call rather than an answer."""
+    content = getattr(llm_response, "content", None)
+    parts = getattr(content, "parts", None) or []
+    if any(getattr(part, "function_call", None) for part in parts):
+        return None
+    return "".join(getattr(part, "text", None) or "" for part in parts)
+
+
+async def model_escalation_callback(callback_context, llm_response):
+    """
+    ADK after_model_callback that re-asks a stronger tier when an answer fails validation.
+
+    Only the rejected model call is repeated, with the same request. Tools
+    have already run once and the rejected answer is replaced before it
+    reaches the session, so an escalated turn commits a single answer.
+
+    Args:
+        callback_context: ADK callback context (agent name and session state)
+        llm_response: Response from the tier chosen by model_tier_callback
+
+    Returns:
+        The strongest tier's response obtained, or None to keep the original
+        (also when the stronger model call fails)
+    """
+    agent_name = getattr(callback_context, "agent_name", "")
+    state = getattr(callback_context, "state", None) or {}
+    llm_request = _pending_model_requests.pop(
+        (getattr(callback_context, "invocation_id", ""), agent_name), None
+    )
+    text = _final_response_text(llm_response)
+    if llm_request is None or text is None:
+        return None
+
+    complexity = estimate_query_complexity(state.get("current_query", ""))
+    tier = state.get("last_model_tier", "standard")
+    issues = validate_response(agent_name, text)
+    escalated = None
+
+    while issues:
+        next_tier = next_model_tier(agent_name, tier)
+        if not next_tier:
+            break
+
+        decision = select_model_tier(agent_name, complexity, min_tier=next_tier)
+        decision["issues"] = issues
+        model_decision_log.append(decision)
+        logger.warning(f"Escalating {agent_name} from {tier} to {decision['tier']}: {issues}")
+
+        llm_request.model = decision["model"]
+        try:
+            response = None
+            async for response in LLMRegistry.new_llm(decision["model"]).generate_content_async(
+                llm_request, stream=False
+            ):
+                pass
+        except Exception as e:
+            # Quota, network or safety errors must not fail a turn that already has an answer
+            decision["error"] = repr(e)
+            logger.error(f"Escalation of {agent_name} to {decision['tier']} failed: {e!r}")
+            break
+        if response is None:
+            decision["error"] = "empty response"
+            break
+
+        escalated = response
+        tier = decision["tier"]
+        state["last_model_tier"] = tier
+        text = _final_response_text(escalated)
+        if text is None:
+            break  # The stronger model chose to call a tool; let the agent continue
+        issues = validate_response(agent_name, text)
+
+    return escalated
+
+
+def export_model_decisions(path: str) -> int:
+    """
+    Write recorded tiering decisions to a JSONL file for offline replay.
+
+    Args:
+        path: Output file path
+
+    Returns:
+        Number of decisions written
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for decision in model_decision_log:
+            f.write(json.dumps(decision) + "\n")
+    return len(model_decision_log)
+
+
+def replay_model_decisions(
+    path: str,
+    slo_ms: Optional[int] = None,
+    cost_slo: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Offline benchmark: re-run tier selection over recorded decisions.
+
+    Args:
+        path: JSONL file written by export_model_decisions
+        slo_ms: Latency budget to evaluate (defaults to LATENCY_SLO_MS)
+        cost_slo: Cost budget to evaluate (defaults to COST_SLO)
+
+    Returns:
+        Comparison of recorded and replayed tiers, latency and cost
+    """
+    with open(path, encoding="utf-8") as f:
+        recorded = [json.loads(line) for line in f if line.strip()]
+
+    summary = {
+        "decisions": len(recorded),
+        "changed": 0,
+        "recorded_tiers": {tier: 0 for tier in TIER_ORDER},
+        "replayed_tiers": {tier: 0 for tier in TIER_ORDER},
+        "recorded_latency_ms": 0,
+        "replayed_latency_ms": 0,
+        "recorded_cost": 0.0,
+        "replayed_cost": 0.0
+    }
+
+    for decision in recorded:
+        replayed = select_model_tier(
+            decision["agent"],
+            decision["complexity"],
+            min_tier=decision.get("min_tier"),
+            slo_ms=slo_ms,
+            cost_slo=cost_slo
+        )
+        summary["changed"] += replayed["tier"] != decision["tier"]
+        summary["recorded_tiers"][decision["tier"]] += 1
+        summary["replayed_tiers"][replayed["tier"]] += 1
+        summary["recorded_latency_ms"] += decision["estimated_latency_ms"]
+        summary["replayed_latency_ms"] += replayed["estimated_latency_ms"]
+        summary["recorded_cost"] += decision["relative_cost"]
+        summary["replayed_cost"] += replayed["relative_cost"]
+
+    return summary
+
+# ============================================================================
+# SPECULATIVE SPECIALIST PREFETCH
+# ============================================================================
+
+SPECULATIVE_PREFETCH = os.getenv("SPECULATIVE_PREFETCH", "true").lower() == "true"
+
+# How long a specialist waits for an unfinished prefetch before going without it
+PREFETCH_WAIT_SECONDS = float(os.getenv("PREFETCH_WAIT_SECONDS", "0.5"))
+
+# Keywords mirroring the coordinator's routing logic
+ROUTING_KEYWORDS = {
+    "learning_assistant_agent": [
+        "explain", "how does", "teach me", "solve", "practice", "exercise",
+        "problem", "example", "understand"
+    ],
+    "study_planner_agent": [
+        "study plan", "schedule", "plan", "time management", "organize",
+        "progress", "deadline", "exam prep"
+    ],
+    "wellness_coach_agent": [
+        "stress", "anxious", "anxiety", "overwhelmed", "burnout", "tired",
+        "can't focus", "motivation", "sleep"
+    ],
+    "resource_finder_agent": [
+        "resource", "tutorial", "book", "course", "video", "material",
+        "documentation", "where can i learn", "recommend"
+    ]
+}
+
+_prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+_prefetch_lock = threading.Lock()
+_active_speculations: Dict[str, Dict[str, Any]] = {}
+
+speculation_stats = {
+    "started": 0,
+    "hits": 0,
+    "misses": 0,
+    "cancelled_before_start": 0,
+    "wasted_ms": 0.0,
+    "waited_ms": 0.0,
+    "overlapped_ms": 0.0
+}
+
+
+def predict_specialist(query: str) -> Optional[str]:
+    """
+    Guess which specialist the coordinator will route a query to.
+
+    Args:
+        query: Student message
+
+    Returns:
+        Agent name with the most keyword matches, or None if there is no clear winner
+    """
+    text = (query or "").lower()
+    scores = {
+        agent: sum(1 for keyword in keywords if keyword in text)
+        for agent, keywords in ROUTING_KEYWORDS.items()
+    }
+    best = max(scores, key=scores.get)
+    ranked = sorted(scores.values(), reverse=True)
+    if ranked[0] == 0 or ranked[0] == ranked[1]:
+        return None
+    return best
+
+
+# Memory kinds each specialist recalls (None means all kinds)
+SPECIALIST_MEMORY_KINDS = {
+    "learning_assistant_agent": None,
+    "study_planner_agent": ["progress", "interaction"],
+    "wellness_coach_agent": ["wellness", "interaction"],
+    "resource_finder_agent": ["interaction"]
+}
+
+
+def start_speculation(speculation_id: str, user_id: str, query: str) -> Optional[str]:
+    """
+    Start the likely specialist's Memory Bank recall while the coordinator routes.
+
+    The recall (embedding, index search and record reads, plus loading the
+    bank on first use) otherwise runs in the specialist's first model
+    callback, after routing has finished.
+
+    Args:
+        speculation_id: Key for this turn's speculation (the session id)
+        user_id: Student whose memories are recalled
+        query: Student message
+
+    Returns:
+        Predicted specialist name, or None if nothing was started
+    """
+    agent_name = predict_specialist(query)
+    if not SPECULATIVE_PREFETCH or agent_name is None:
+        return None
+
+    speculation = {"agent": agent_name, "resolved": False, "hit": False, "duration_ms": 0.0}
+    kinds = SPECIALIST_MEMORY_KINDS.get(agent_name)
+
+    def task():
+        start = time.perf_counter()
+        try:
+            return recall_memories(user_id, query, kinds=kinds)
+        finally:
+            speculation["duration_ms"] = (time.perf_counter() - start) * 1000
+
+    with _prefetch_lock:
+        speculation["future"] = _prefetch_executor.submit(task)
+        _active_speculations[speculation_id] = speculation
+        speculation_stats["started"] += 1
+
+    logger.info(f"Speculative memory recall started for {agent_name}")
+    return agent_name
+
+
+def _discard_speculation(speculation: Dict[str, Any]) -> None:
+    """Cancel a mispredicted prefetch and account for any work already done."""
+    future = speculation["future"]
+    if future.cancel():
+        with _prefetch_lock:
+            speculation_stats["cancelled_before_start"] += 1
+        return
+
+    def record_waste(_):
+        with _prefetch_lock:
+            speculation_stats["wasted_ms"] += speculation["duration_ms"]
+
+    future.add_done_callback(record_waste)
+
+
+async def resolve_speculation(speculation_id: str, agent_name: str) -> Optional[List[str]]:
+    """
+    Hand the prefetched memories to the predicted specialist.
+
+    Other specialists (e.g. the learning assistant running before the
+    predicted planner) leave the speculation untouched. The wait is awaited
+    so the event loop keeps serving other sessions.
+
+    Args:
+        speculation_id: Key passed to start_speculation
+        agent_name: Specialist about to call the model
+
+    Returns:
+        Prefetched memory lines, or None if this agent must recall them itself
+    """
+    with _prefetch_lock:
+        speculation = _active_speculations.get(speculation_id)
+        if not speculation or agent_name != speculation["agent"]:
+            return None
+        if speculation["resolved"]:
+            return speculation.get("result") if speculation["hit"] else None
+        speculation["resolved"] = True
+
+    wait_start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(
+            asyncio.shield(asyncio.wrap_future(speculation["future"])), PREFETCH_WAIT_SECONDS
+        )
+    except Exception as e:
+        logger.warning(f"Prefetch for {agent_name} unusable: {e!r}")
+        with _prefetch_lock:
+            speculation_stats["misses"] += 1
+        _discard_speculation(speculation)
+        return None
+    waited_ms = (time.perf_counter() - wait_start) * 1000
+
+    with _prefetch_lock:
+        speculation["result"] = result
+        speculation["hit"] = True
+        speculation_stats["hits"] += 1
+        speculation_stats["waited_ms"] += waited_ms
+        # Only the part of the recall that finished before the specialist needed it was saved
+        speculation_stats["overlapped_ms"] += max(0.0, speculation["duration_ms"] - waited_ms)
+    return result
+
+
+def finish_speculation(speculation_id: str) -> None:
+    """Close out a turn; a miss if the predicted specialist never asked for its prefetch."""
+    with _prefetch_lock:
+        speculation = _active_speculations.pop(speculation_id, None)
+        unresolved = speculation is not None and not speculation["resolved"]
+        if unresolved:
+            speculation["resolved"] = True
+            speculation_stats["misses"] += 1
+    if unresolved:
+        _discard_speculation(speculation)
+
+
+def get_speculation_stats() -> Dict[str, Any]:
+    """Return prefetch counters together with the hit rate."""
+    with _prefetch_lock:
+        stats = dict(speculation_stats)
+    settled = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / settled, 3) if settled else 0.0
+    return stats
+
+
+async def specialist_model_callback(callback_context, llm_request):
+    """
+    before_model_callback for specialists: model tiering plus long-term memories.
+
+    Memories are recalled once per specialist per turn, taken from the
+    speculative prefetch when routing matched the prediction.
+
+    Args:
+        callback_context: ADK callback context (agent name and session state)
+        llm_request: Outgoing model request, updated in place
+
+    Returns:
+        None so the request proceeds to the model
+    """
+    model_tier_callback(callback_context, llm_request)
+
+    agent_name = getattr(callback_context, "agent_name", "")
+    state = getattr(callback_context, "state", None) or {}
+    user_id = state.get("user_id")
+    if not user_id:
+        return None
+
+    recalled = dict(state.get("recalled_memories") or {})
+    if agent_name not in recalled:
+        memories = await resolve_speculation(state.get("speculation_id", ""), agent_name)
+        if memories is None:
+            memories = await asyncio.to_thread(
+                recall_memories, user_id, state.get("current_query", ""),
+                kinds=SPECIALIST_MEMORY_KINDS.get(agent_name)
+            )
+        recalled[agent_name] = memories
+        state["recalled_memories"] = recalled
+
+    memories = recalled[agent_name]
+    if memories and hasattr(llm_request, "append_instructions"):
+        llm_request.append_instructions([
+            "Relevant long-term memories about this student:\n"
+            + "\n".join(f"- {memory}" for memory in memories)
+        ])
+    return None
+
+# ============================================================================
+# MEMORY BANK (LONG-TERM STUDENT MEMORY)
+# ============================================================================
+
+MEMORY_BANK_DIR = os.getenv("MEMORY_BANK_DIR", "memory_bank")
+MEMORY_EMBEDDING_DIM = int(os.getenv("MEMORY_EMBEDDING_DIM", "256"))
+MEMORY_TOP_K = int(os.getenv("MEMORY_TOP_K", "3"))
+MEMORY_TRAIN_SIZE = int(os.getenv("MEMORY_TRAIN_SIZE", "50000"))
+
+# Students with at most this many memories are searched exactly
+MEMORY_EXACT_SEARCH_LIMIT = 2048
+
+MEMORY_KINDS = ["interaction", "progress", "wellness"]
+
+
+def embed_text(text: str, dim: int = MEMORY_EMBEDDING_DIM) -> np.ndarray:
+    """
+    Embed text locally with signed feature hashing of words and word pairs.
+
+    Args:
+        text: Text to embed
+        dim: Embedding dimension
+
+    Returns:
+        L2-normalised float32 vector (all zeros for empty text)
+    """
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))  # Stable across processes, unlike hash()
+        vector[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    """Return array with room for at least size rows, doubling its capacity."""
+    if size <= len(array):
+        return array
+    grown = np.zeros((max(size, len(array) * 2),) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class _RowIndex:
+    """Growable arrays of row ids keyed by an integer (a student, or student and cluster)."""
+
+    def __init__(self):
+        self._rows: Dict[int, np.ndarray] = {}
+        self._sizes: Dict[int, int] = {}
+
+    @classmethod
+    def from_keys(cls, keys: np.ndarray) -> "_RowIndex":
+        """Group row ids 0..len(keys)-1 by key in one vectorised pass."""
+        index = cls()
+        if not len(keys):
+            return index
+        order = np.argsort(keys, kind="stable")
+        unique, starts = np.unique(keys[order], return_index=True)
+        for key, rows in zip(unique.tolist(), np.split(order, starts[1:])):
+            index._rows[key] = rows.astype(np.int64)
+            index._sizes[key] = len(rows)
+        return index
+
+    def append(self, key: int, row: int) -> None:
+        size = self._sizes.get(key, 0)
+        rows = _grow(self._rows.get(key, np.zeros(0, dtype=np.int64)), max(16, size + 1))
+        rows[size] = row
+        self._rows[key] = rows
+        self._sizes[key] = size + 1
+
+    def get(self, key: int) -> np.ndarray:
+        if key not in self._rows:
+            return np.zeros(0, dtype=np.int64)
+        return self._rows[key][:self._sizes[key]]
+
+
+class MemoryBank:
+    """
+    Per-student long-term memory backed by an IVF (inverted file) index.
+
+    Vectors live in one growable NumPy matrix. Once enough memories exist,
+    k-means centroids are trained in a background thread and every memory
+    is filed under its (student, nearest centroid) list, so a search only
+    scores the few lists closest to the query. Students with few memories,
+    or any student while the index is being built, are searched exactly.
+
+    With a directory, every insert is appended to disk: the user id to
+    users.txt (first time only), the record to records.jsonl, the vector
+    to vectors.f32 and finally (student, kind, record end offset) to
+    rows.i64. A row counts only once its rows.i64 entry exists, so after a
+    crash all files are truncated back to the last complete row. Files are
+    read on first use (or by preload at startup), not when the bank is
+    created, and never under the lock searches take.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        dim: int = MEMORY_EMBEDDING_DIM,
+        n_lists: int = 256,
+        n_probe: int = 8,
+        train_size: int = MEMORY_TRAIN_SIZE
+    ):
+        self.directory = directory
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_size = train_size
+
+        self.centroids: Optional[np.ndarray] = None
+        self._count = 0
+        self._vectors = np.zeros((1024, dim), dtype=np.float32)
+        self._rows = np.zeros((1024, 3), dtype=np.int64)  # student code, kind code, record end
+        self._records: List[Dict[str, Any]] = []          # Only used without a directory
+        self._users: List[str] = []
+        self._user_codes: Dict[str, int] = {}
+        self._user_rows = _RowIndex()
+        self._lists = _RowIndex()
+        self._loaded = directory is None
+        self._indexing = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        with self._lock:
+            return self._count
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def add(
+        self,
+        user_id: str,
+        text: str,
+        kind: str = "interaction",
+        created_at: Optional[str] = None
+    ) -> int:
+        """
+        Embed and insert one memory.
+
+        Args:
+            user_id: Student the memory belongs to
+            text: Memory text (already summarised)
+            kind: interaction, progress or wellness
+            created_at: ISO timestamp, defaults to now
+
+        Returns:
+            Row id of the new memory
+        """
+        vector = embed_text(text, self.dim)
+        record = {
+            "user_id": user_id,
+            "kind": kind,
+            "text": text,
+            "created_at": created_at or datetime.now().isoformat()
+        }
+
+        self._ensure_loaded()
+        with self._lock:
+            user_code = self._user_code(user_id)
+            row = self._count
+            record_end = 0
+
+            if self.directory:
+                line = (json.dumps(record) + "\n").encode("utf-8")
+                with open(self._path("records.jsonl"), "ab") as f:
+                    f.write(line)
+                    record_end = f.tell()
+                with open(self._path("vectors.f32"), "ab") as f:
+                    f.write(vector.tobytes())
+            else:
+                self._records.append(record)
+
+            self._vectors = _grow(self._vectors, row + 1)
+            self._rows = _grow(self._rows, row + 1)
+            self._vectors[row] = vector
+            self._rows[row] = (user_code, MEMORY_KINDS.index(kind), record_end)
+
+            if self.directory:
+                with open(self._path("rows.i64"), "ab") as f:  # Commit marker, written last
+                    f.write(self._rows[row].tobytes())
+
+            self._count += 1
+            self._user_rows.append(user_code, row)
+            if self.centroids is not None:
+                cluster = int(np.argmax(self.centroids @ vector))
+                self._lists.append(user_code * self.n_lists + cluster, row)
+
+            start_indexing = (
+                self.centroids is None and not self._indexing and self._count >= self.train_size
+            )
+            if start_indexing:
+                self._indexing = True
+
+        if start_indexing:
+            threading.Thread(target=self.train, name="memory-bank-train", daemon=True).start()
+        return row
+
+    def _user_code(self, user_id: str) -> int:
+        """Integer code for a student, registering new ones (caller holds the lock)."""
+        code = self._user_codes.get(user_id)
+        if code is None:
+            code = len(self._users)
+            if self.directory:
+                with open(self._path("users.txt"), "a", encoding="utf-8") as f:
+                    f.write(user_id + "\n")
+            self._users.append(user_id)
+            self._user_codes[user_id] = code
+        return code
+
+    def train(self, n_iter: int = 10) -> None:
+        """
+        Train k-means centroids on a sample and file every memory under its cluster.
+
+        Runs in a background thread once train_size memories exist; the lock
+        is only held to snapshot the rows and to install the finished index.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            count = self._count
+            vectors = self._vectors  # Rows below count never change, even if the matrix grows
+            self._indexing = True
+
+        try:
+            n_lists = min(self.n_lists, count)
+            if n_lists == 0:
+                return
+
+            rng = np.random.default_rng(0)
+            sample = vectors[np.sort(rng.choice(count, size=min(count, 64 * n_lists), replace=False))]
+            centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+            for _ in range(n_iter):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, sample)
+                filled = np.bincount(assignment, minlength=n_lists) > 0
+                centroids[filled] = sums[filled]
+                norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+                centroids /= np.where(norms == 0, 1, norms)
+
+            if self.directory:
+                np.save(self._path("centroids.npy"), centroids)
+            self._build_index(centroids, count, vectors)
+            logger.info(f"Memory Bank index trained: {n_lists} lists over {count} memories")
+        finally:
+            self._indexing = False
+
+    def _build_index(self, centroids: np.ndarray, count: int, vectors: np.ndarray, chunk: int = 65536) -> None:
+        """File rows 0..count-1 under their clusters, then install the index."""
+        clusters = np.concatenate([
+            np.argmax(vectors[start:min(start + chunk, count)] @ centroids.T, axis=1)
+            for start in range(0, count, chunk)
+        ]) if count else np.zeros(0, dtype=np.int64)
+
+        with self._lock:
+            user_codes = self._rows[:count, 0]
+            lists = _RowIndex.from_keys(user_codes * len(centroids) + clusters)
+            for row in range(count, self._count):  # Added while we were computing
+                cluster = int(np.argmax(centroids @ self._vectors[row]))
+                lists.append(int(self._rows[row, 0]) * len(centroids) + cluster, row)
+            self.n_lists = len(centroids)
+            self._lists = lists
+            self.centroids = centroids
+
+    def search(
+        self,
+        user_id: str,
+        query: str,
+        k: int = MEMORY_TOP_K,
+        kinds: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the student's k memories most similar to the query.
+
+        Args:
+            user_id: Student whose memories are searched
+            query: Text to match against
+            k: Number of memories to return
+            kinds: Only return memories of these kinds (default: all)
+
+        Returns:
+            Memory records with a similarity "score", best first
+        """
+        vector = embed_text(query, self.dim)
+        if not vector.any():
+            return []
+
+        self._ensure_loaded()
+        with self._lock:
+            user_code = self._user_codes.get(user_id)
+            if user_code is None:
+                return []
+
+            user_rows = self._user_rows.get(user_code)
+            candidates = None
+            if self.centroids is not None and len(user_rows) > MEMORY_EXACT_SEARCH_LIMIT:
+                probes = np.argsort(self.centroids @ vector)[-self.n_probe:]
+                candidates = self._of_kinds(np.concatenate(
+                    [self._lists.get(user_code * self.n_lists + int(c)) for c in probes]
+                ), kinds)
+            if candidates is None or len(candidates) < k:
+                candidates = self._of_kinds(user_rows, kinds)  # Exact scan
+            # Committed rows never change, so these are safe to read after unlocking
+            vectors, rows = self._vectors, self._rows
+
+        if not len(candidates):
+            return []
+
+        scores = vectors[candidates] @ vector
+        k = min(k, len(scores))
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        records = self._read_records(rows, candidates[top])
+        return [
+            {**record, "score": round(float(scores[i]), 4)}
+            for record, i in zip(records, top)
+        ]
+
+    def _of_kinds(self, rows: np.ndarray, kinds: Optional[List[str]]) -> np.ndarray:
+        """Keep only rows of the given kinds (caller holds the lock)."""
+        if kinds is None:
+            return rows
+        codes = [MEMORY_KINDS.index(kind) for kind in kinds]
+        return rows[np.isin(self._rows[rows, 1], codes)]
+
+    def _read_records(self, rows: np.ndarray, selected: np.ndarray) -> List[Dict[str, Any]]:
+        """Fetch the selected records' text and metadata (no lock needed)."""
+        if not self.directory:
+            return [self._records[int(row)] for row in selected]
+        records = []
+        with open(self._path("records.jsonl"), "rb") as f:
+            for row in selected.tolist():
+                start = int(rows[row - 1, 2]) if row else 0
+                f.seek(start)
+                records.append(json.loads(f.read(int(rows[row, 2]) - start)))
+        return records
+
+    def preload(self) -> None:
+        """Start reading earlier runs' memories in the background, e.g. at startup."""
+        if not self._loaded:
+            threading.Thread(target=self._ensure_loaded, name="memory-bank-load", daemon=True).start()
+
+    def _ensure_loaded(self) -> None:
+        """Read earlier runs' memories once; callers wait only for the load itself."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def _load(self) -> None:
+        """Read and repair the files, then install them (caller holds _load_lock)."""
+        os.makedirs(self.directory, exist_ok=True)
+
+        users = []
+        users_path = self._path("users.txt")
+        if os.path.exists(users_path):
+            _truncate_partial_line(users_path)
+            with open(users_path, encoding="utf-8") as f:
+                users = f.read().splitlines()
+
+        rows = _read_array(self._path("rows.i64"), np.int64, 3)
+        vectors = _read_array(self._path("vectors.f32"), np.float32, self.dim)
+        count = min(len(rows), len(vectors))
+        record_end = int(rows[count - 1, 2]) if count else 0
+
+        # Drop anything written after the last complete row so new rows line up
+        for name, size in [
+            ("rows.i64", count * 3 * 8),
+            ("vectors.f32", count * self.dim * 4),
+            ("records.jsonl", record_end)
+        ]:
+            if os.path.exists(self._path(name)) and os.path.getsize(self._path(name)) > size:
+                logger.warning(f"Memory Bank: discarding incomplete write at the end of {name}")
+                with open(self._path(name), "rb+") as f:
+                    f.truncate(size)
+
+        vectors = _grow(vectors[:count].copy(), max(1024, count))
+        rows = _grow(rows[:count].copy(), max(1024, count))
+        user_rows = _RowIndex.from_keys(rows[:count, 0])
+
+        with self._lock:
+            self._users = users
+            self._user_codes = {user_id: code for code, user_id in enumerate(users)}
+            self._count = count
+            self._vectors = vectors
+            self._rows = rows
+            self._user_rows = user_rows
+
+        centroids_path = self._path("centroids.npy")
+        if os.path.exists(centroids_path) and count:
+            self._indexing = True
+            threading.Thread(
+                target=self._reindex, args=(np.load(centroids_path), count, vectors),
+                name="memory-bank-index", daemon=True
+            ).start()
+        logger.info(f"Memory Bank loaded {count} memories from {self.directory}")
+
+    def _reindex(self, centroids: np.ndarray, count: int, vectors: np.ndarray) -> None:
+        """Rebuild the inverted lists from saved centroids after a restart."""
+        try:
+            self._build_index(centroids, count, vectors)
+        finally:
+            self._indexing = False
+
+
+def _read_array(path: str, dtype, width: int) -> np.ndarray:
+    """Read a flat binary file as rows of width values, ignoring a partial last row."""
+    if not os.path.exists(path):
+        return np.zeros((0, width), dtype=dtype)
+    raw = np.fromfile(path, dtype=dtype)
+    return raw[:len(raw) // width * width].reshape(-1, width)
+
+
+def _truncate_partial_line(path: str) -> None:
+    """Cut a partial last line so new lines are not appended onto it."""
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+memory_bank = MemoryBank(MEMORY_BANK_DIR)
+
+
+def recall_memories(
+    user_id: str,
+    query: str,
+    k: int = MEMORY_TOP_K,
+    kinds: Optional[List[str]] = None
+) -> List[str]:
     """
-    Custom tool to recommend curated educational resources.
-    
+    Fetch the student's most relevant memories as short lines for agent context.
+
     Args:
-        topic: Learning topic
-        difficulty_level: beginner, intermediate, advanced
-        resource_types: List of types (video, article, tutorial, book, course)
-        tool_context: ADK tool context
-        
+        user_id: Student identifier
+        query: Current student message
+        k: Number of memories
+        kinds: Only recall memories of these kinds (default: all)
+
     Returns:
-        Curated resource recommendations
+        Memory lines prefixed with their kind and date
     """
-    logger.info(f"Recommending resources for: {topic} ({difficulty_level})")
-    
-    # Simulated resource database (in production, would query real database)
-    resource_db = {
-        "beginner": {
-            "video": ["YouTube tutorials", "Khan Academy videos", "Coursera beginner courses"],
-            "article": ["GeeksforGeeks basics", "TutorialsPoint introductions", "W3Schools guides"],
-            "tutorial": ["freeCodeCamp", "Codecademy interactive lessons", "Udemy beginner tracks"],
-            "book": ["Head First series", "For Dummies series", "Visual QuickStart guides"],
-            "course": ["Coursera Specializations", "edX MicroMasters", "Udacity Nanodegrees"]
-        },
-        "intermediate": {
-            "video": ["MIT OpenCourseWare", "Stanford Online", "Pluralsight intermediate"],
-            "article": ["Medium deep-dives", "Dev.to technical posts", "HackerNoon guides"],
-            "tutorial": ["Real Python", "The Odin Project", "FullStackOpen"],
-            "book": ["O'Reilly books", "Apress technical books", "Manning Publications"],
-            "course": ["Advanced Coursera courses", "LinkedIn Learning paths", "Frontend Masters"]
-        },
-        "advanced": {
-            "video": ["Conference talks", "Research presentations", "Advanced Udemy courses"],
-            "article": ["Research papers", "IEEE publications", "ACM Digital Library"],
-            "tutorial": ["Official documentation", "GitHub advanced guides", "Awesome lists"],
-            "book": ["Academic textbooks", "Domain-specific monographs", "Research compilations"],
-            "course": ["Graduate-level MOOCs", "Specialized certifications", "Expert masterclasses"]
-        }
-    }
-    
-    level = difficulty_level.lower() if difficulty_level.lower() in resource_db else "intermediate"
-    
-    recommendations = {
-        "topic": topic,
-        "difficulty_level": level,
-        "resources": {}
-    }
-    
-    for res_type in resource_types:
-        if res_type in resource_db[level]:
-            recommendations["resources"][res_type] = resource_db[level][res_type]
-    
-    recommendations["search_queries"] = [
-        f"{topic} {level} tutorial",
-        f"best {topic} resources for {level}",
-        f"{topic} {level} projects"
+    return [
+        f"[{m['kind']} {m['created_at'][:10]}] {m['text']}"
+        for m in memory_bank.search(user_id, query, k, kinds)
     ]
-    
-    recommendations["generated_at"] = datetime.now().isoformat()
-    
-    return recommendations
 
 
-# Create FunctionTool instances for each custom tool
-schedule_creator_tool = FunctionTool(create_study_schedule)
-progress_tracker_tool = FunctionTool(track_progress)
-wellness_check_tool = FunctionTool(assess_wellness)
-resource_recommender_tool = FunctionTool(recommend_resources)
+def remember_turn(
+    user_id: str,
+    user_input: str,
+    response_text: str,
+    state,
+    progress_before: Dict[str, Any],
+    wellness_count_before: int
+) -> None:
+    """
+    Store a finished turn and any progress or wellness it produced.
 
-logger.info("Custom tools initialized: schedule_creator, progress_tracker, wellness_check, resource_recommender")
+    Args:
+        user_id: Student identifier
+        user_input: Student message
+        response_text: Final answer
+        state: Session state after the turn
+        progress_before: progress_tracking as it was before the turn
+        wellness_count_before: len(wellness_history) before the turn
+    """
+    memory_bank.add(user_id, f"Student asked: {user_input} | Answer: {response_text[:300]}")
+
+    for task_id, entry in state.get("progress_tracking", {}).items():
+        if progress_before.get(task_id, {}).get("timestamp") != entry["timestamp"]:
+            notes = f" ({entry['notes']})" if entry.get("notes") else ""
+            memory_bank.add(user_id, f"Task {task_id} marked {entry['status']}{notes}", kind="progress")
+
+    for assessment in state.get("wellness_history", [])[wellness_count_before:]:
+        memory_bank.add(
+            user_id,
+            f"Wellness {assessment['overall_status']} (score {assessment['wellness_score']}): "
+            f"stress {assessment['stress_status']}, sleep {assessment['sleep_status']}, "
+            f"exercise {assessment['exercise_status']}",
+            kind="wellness"
+        )
 
 # ============================================================================
 # SPECIALIZED AGENT DEFINITIONS
@@ -325,7 +2044,7 @@ logger.info("Custom tools initialized: schedule_creator, progress_tracker, welln
 
 # 1. Learning Assistant Agent (Sequential Workflow)
 learning_assistant_agent = Agent(
-    model="gemini-2.0-flash-exp",
+    model=MODEL_TIERS[AGENT_TIER_POLICY["learning_assistant_agent"][0]],
     name="learning_assistant_agent",
     description="""
     Specialized agent for personalized learning assistance. Explains concepts,
@@ -363,12 +2082,14 @@ learning_assistant_agent = Agent(
     - Provide detailed solution explanations
     - Suggest variations for extra practice
     """,
-    tools=[code_execution]  # Can execute code to demonstrate concepts
+    tools=[code_execution],  # Can execute code to demonstrate concepts
+    before_model_callback=specialist_model_callback,
+    after_model_callback=model_escalation_callback
 )
 
 # 2. Study Planner Agent
 study_planner_agent = Agent(
-    model="gemini-2.0-flash-exp",
+    model=MODEL_TIERS[AGENT_TIER_POLICY["study_planner_agent"][0]],
     name="study_planner_agent",
     description="""
     Specialized agent for intelligent study planning and time management.
@@ -406,12 +2127,14 @@ study_planner_agent = Agent(
 
     Always encourage healthy study habits and work-life balance.
     """,
-    tools=[schedule_creator_tool, progress_tracker_tool]
+    tools=[schedule_creator_tool, progress_tracker_tool],
+    before_model_callback=specialist_model_callback,
+    after_model_callback=model_escalation_callback
 )
 
 # 3. Wellness Coach Agent
 wellness_coach_agent = Agent(
-    model="gemini-2.0-flash-exp",
+    model=MODEL_TIERS[AGENT_TIER_POLICY["wellness_coach_agent"][0]],
     name="wellness_coach_agent",
     description="""
     Specialized agent for mental wellness and student wellbeing support.
@@ -457,12 +2180,14 @@ wellness_coach_agent = Agent(
 
     Remember: Small improvements in wellbeing can lead to big academic gains.
     """,
-    tools=[wellness_check_tool]
+    tools=[wellness_check_tool],
+    before_model_callback=specialist_model_callback,
+    after_model_callback=model_escalation_callback
 )
 
 # 4. Resource Finder Agent (Parallel Workflow)
 resource_finder_agent = Agent(
-    model="gemini-2.0-flash-exp",
+    model=MODEL_TIERS[AGENT_TIER_POLICY["resource_finder_agent"][0]],
     name="resource_finder_agent",
     description="""
     Specialized agent for discovering and curating educational resources.
@@ -515,7 +2240,9 @@ resource_finder_agent = Agent(
     - Well-maintained and current
     - From reputable sources
     """,
-    tools=[google_search, resource_recommender_tool]
+    tools=[google_search, resource_recommender_tool],
+    before_model_callback=specialist_model_callback,
+    after_model_callback=model_escalation_callback
 )
 
 logger.info("Specialized agents initialized: learning_assistant, study_planner, wellness_coach, resource_finder")
@@ -525,7 +2252,7 @@ logger.info("Specialized agents initialized: learning_assistant, study_planner,
 # ============================================================================
 
 coordinator_agent = Agent(
-    model="gemini-2.0-flash-exp",
+    model=MODEL_TIERS[AGENT_TIER_POLICY["coordinator_agent"][0]],
     name="coordinator_agent",
     description="""
     Root coordinator agent that intelligently routes student requests 
@@ -595,7 +2322,9 @@ coordinator_agent = Agent(
         wellness_coach_agent,
         resource_finder_agent
     ],
-    tools=[]  # Coordinator doesn't need tools, delegates to specialists
+    tools=[],  # Coordinator doesn't need tools, delegates to specialists
+    before_model_callback=model_tier_callback,
+    after_model_callback=model_escalation_callback
 )
 
 logger.info("Root Coordinator Agent initialized with 4 specialist sub-agents")
@@ -615,16 +2344,498 @@ runner = Runner(
 
 logger.info("Runner initialized with InMemorySessionService")
 
+
+def run_turn(user_id: str, session_id: str, user_input: str) -> str:
+    """
+    Run one student turn through the agent system with adaptive model tiering.
+
+    Each model call uses the tier picked by model_tier_callback; a final
+    answer that fails validation is re-asked on a stronger tier by
+    model_escalation_callback, so the turn itself runs only once.
+    The predicted specialist's Memory Bank recall runs alongside routing
+    (see start_speculation), and the turn is stored in the Memory Bank.
+
+    Args:
+        user_id: Student identifier
+        session_id: Session identifier
+        user_input: Student message
+
+    Returns:
+        Final response text
+    """
+    session = session_service.get_session(
+        app_name="eduassist_ai",
+        user_id=user_id,
+        session_id=session_id
+    )
+    session.state["user_id"] = user_id
+    session.state["session_id"] = session_id
+    session.state["current_query"] = user_input
+
+    # Recall the likely specialist's memories in parallel with the coordinator's routing
+    session.state["speculation_id"] = session_id
+    session.state["recalled_memories"] = {}
+    start_speculation(session_id, user_id, user_input)
+
+    progress_before = dict(session.state.get("progress_tracking", {}))
+    wellness_count_before = len(session.state.get("wellness_history", []))
+
+    message = content_types.Content(
+        role="user",
+        parts=[user_input]
+    )
+
+    try:
+        response_text = _run_agents(user_id, session_id, session, message)
+    finally:
+        finish_speculation(session_id)
+
+    remember_turn(
+        user_id, user_input, response_text, session.state,
+        progress_before, wellness_count_before
+    )
+    return response_text
+
+
+def _run_agents(user_id: str, session_id: str, session, message) -> str:
+    """Run the turn through the runner once and return the final answer text."""
+    start = time.perf_counter()
+    response = runner.run(
+        user_id=user_id,
+        session_id=session_id,
+        content=message
+    )
+
+    response_text, author = "", "coordinator_agent"
+    for event in response.events:
+        if event.type == "content" and event.content.role == "agent":
+            response_text = event.content.parts[0].text
+            author = getattr(event, "author", author)
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    tier = session.state.get("last_model_tier", "standard")
+    logger.info(f"Turn answered by {author} on {tier} tier in {elapsed_ms:.0f}ms")
+    return response_text
+
+# ============================================================================
+# DETERMINISTIC FAST PATH FOR STRUCTURED COMMANDS
+# ============================================================================
+
+# Words students use for each track_progress status
+STATUS_SYNONYMS = {
+    "completed": "completed", "complete": "completed", "done": "completed",
+    "finished": "completed", "in progress": "in_progress", "in_progress": "in_progress",
+    "started": "in_progress", "blocked": "blocked", "stuck": "blocked",
+    "not started": "not_started", "not_started": "not_started"
+}
+
+STATUS_ICONS = {"completed": "✅", "in_progress": "🔄", "blocked": "⛔", "not_started": "⬜"}
+
+_POLITE_PREFIX = r"(?:please\s+|can you\s+|could you\s+)?"
+
+# Words that mean a "task" is really part of a sentence, e.g. "mark it as done"
+TASK_STOPWORDS = {
+    "a", "an", "the", "i", "me", "my", "we", "our", "you", "it", "this", "that",
+    "these", "those", "when", "what", "how", "why", "if", "for", "up", "and", "or",
+    "with", "all", "everything", "something", "anything"
+}
+
+fast_path_stats = {"handled": 0, "fallbacks": 0}
+
+
+def _normalize_task_id(task: str, progress: Dict[str, Any]) -> str:
+    """Reuse an existing task id that differs only in case, spaces or underscores."""
+    key = re.sub(r"[\s_]+", "_", task.strip().lower())
+    for existing in progress:
+        if re.sub(r"[\s_]+", "_", existing.lower()) == key:
+            return existing
+    return key
+
+
+def _show_progress(match, state) -> str:
+    """Template answer for "show my progress"."""
+    progress = state.get("progress_tracking", {})
+    if not progress:
+        return "You haven't tracked any tasks yet. Try: \"mark recursion as in progress\"."
+
+    overall = sum(t["completion_percentage"] for t in progress.values()) / len(progress)
+    lines = [f"📊 Your progress (overall {overall:.1f}%):"]
+    for task_id, entry in progress.items():
+        notes = f" - {entry['notes']}" if entry.get("notes") else ""
+        lines.append(f"  {STATUS_ICONS[entry['status']]} {task_id}: {entry['status'].replace('_', ' ')}{notes}")
+    return "\n".join(lines)
+
+
+def _mark_task(match, state) -> Optional[str]:
+    """Call track_progress directly for "mark <task> as <status>" (None if the task is unclear)."""
+    status = STATUS_SYNONYMS[match.group("status")]
+    progress = state.get("progress_tracking", {})
+    task_id = _normalize_task_id(match.group("task"), progress)
+    if task_id not in progress and TASK_STOPWORDS & set(match.group("task").split()):
+        return None
+
+    entry = track_progress(task_id, status, tool_context=SimpleNamespace(state=state))
+    overall = entry.get("overall_progress", f"{entry['completion_percentage']:.1f}%")
+    return (
+        f"{STATUS_ICONS[status]} Marked {task_id} as {status.replace('_', ' ')}. "
+        f"Overall progress: {overall}."
+    )
+
+
+def _list_schedules(match, state) -> str:
+    """Template answer for "list my study schedules"."""
+    schedules = state.get("study_schedules", [])
+    if not schedules:
+        return "You don't have any study schedules yet. Ask me to create one!"
+
+    lines = ["📅 Your study schedules:"]
+    for s in schedules:
+        lines.append(
+            f"  • {s['subject']}: {s['total_weeks']} weeks, "
+            f"{s['hours_per_day']}h/day, deadline {s['deadline']}"
+        )
+    return "\n".join(lines)
+
+
+# Command grammar: each pattern must match the whole (normalised) message.
+# Task names are one to three words; anything looser is left to the agents.
+FAST_PATH_COMMANDS = [
+    (
+        re.compile(
+            rf"^{_POLITE_PREFIX}(?:show|display|check|what(?:'s| is))\s+(?:me\s+)?my\s+"
+            r"progress(?:\s+report)?$"
+        ),
+        _show_progress
+    ),
+    (
+        re.compile(
+            rf"^{_POLITE_PREFIX}mark\s+(?P<task>[\w+#.-]+(?:\s+[\w+#.-]+){{0,2}}?)\s+(?:(?:as|to)\s+)?"
+            r"(?P<status>" + "|".join(sorted(STATUS_SYNONYMS, key=len, reverse=True)) + r")$"
+        ),
+        _mark_task
+    ),
+    (
+        re.compile(
+            rf"^{_POLITE_PREFIX}(?:list|show)\s+(?:me\s+)?(?:all\s+)?my\s+"
+            r"(?:study\s+)?(?:schedules|plans)$"
+        ),
+        _list_schedules
+    )
+]
+
+
+def try_fast_path(user_id: str, session_id: str, user_input: str) -> Optional[str]:
+    """
+    Answer a structured command without calling the model.
+
+    Args:
+        user_id: Student identifier
+        session_id: Session identifier
+        user_input: Student message
+
+    Returns:
+        Templated response, or None if the message is not a clear command
+    """
+    text = re.sub(r"\s+", " ", (user_input or "").strip().lower()).rstrip(".!?")
+    for pattern, handler in FAST_PATH_COMMANDS:
+        match = pattern.match(text)
+        if not match:
+            continue
+
+        session = session_service.get_session(
+            app_name="eduassist_ai",
+            user_id=user_id,
+            session_id=session_id
+        )
+        session.state["user_id"] = user_id
+        session.state["session_id"] = session_id
+        progress_before = dict(session.state.get("progress_tracking", {}))
+
+        response_text = handler(match, session.state)
+        if response_text is None:
+            break
+        fast_path_stats["handled"] += 1
+        logger.info(f"Fast path handled: {handler.__name__}")
+
+        remember_turn(
+            user_id, user_input, response_text, session.state,
+            progress_before, len(session.state.get("wellness_history", []))
+        )
+        return response_text
+
+    fast_path_stats["fallbacks"] += 1
+    return None
+
+# ============================================================================
+# PRIORITY ADMISSION CONTROL
+# ============================================================================
+
+# Priority classes, highest first
+PRIORITY_CLASSES = ["wellness", "interactive", "bulk"]
+
+# A class may start a turn only while fewer than this many turns are running,
+# so the top of the pool stays free for wellness turns during a surge
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "8"))
+CLASS_CONCURRENCY = {
+    "wellness": ADMISSION_MAX_CONCURRENT,
+    "interactive": max(1, ADMISSION_MAX_CONCURRENT - 2),
+    "bulk": max(1, ADMISSION_MAX_CONCURRENT // 2)
+}
+
+# Queue length and maximum queueing time per class before shedding
+CLASS_QUEUE_LIMITS = {"wellness": 1000, "interactive": 50, "bulk": 10}
+CLASS_MAX_WAIT_SECONDS = {"wellness": 60.0, "interactive": 10.0, "bulk": 2.0}
+
+# Phrases that always mean a distressed student
+CRISIS_MARKERS = [
+    "suicide", "suicidal", "kill myself", "self-harm", "self harm", "hurt myself",
+    "end my life", "hopeless", "panic attack", "can't go on", "cannot go on"
+]
+
+BUSY_REPLY = (
+    "EduAssist AI is helping a lot of students right now. "
+    "Please try again in a minute."
+)
+
+WELLNESS_BUSY_REPLY = (
+    "I'm here for you, but I'm a little slow to respond right now. "
+    "If you are in crisis or thinking about harming yourself, please contact "
+    "your university counseling service, a mental health hotline, or "
+    "emergency services right away."
+)
+
+
+def classify_priority(user_input: str) -> str:
+    """
+    Assign a turn to a priority class.
+
+    Args:
+        user_input: Student message
+
+    Returns:
+        "wellness" for crisis or wellbeing turns, "bulk" for resource
+        lookups, otherwise "interactive"
+    """
+    text = (user_input or "").lower()
+    if any(marker in text for marker in CRISIS_MARKERS):
+        return "wellness"
+
+    predicted = predict_specialist(user_input)
+    if predicted == "wellness_coach_agent":
+        return "wellness"
+    if predicted == "resource_finder_agent":
+        return "bulk"
+    return "interactive"
+
+
+class AdmissionController:
+    """
+    Priority admission in front of the runner.
+
+    Turns start immediately while their class has free concurrency and no
+    equal-or-higher priority turn is waiting. Otherwise they queue per
+    class and are released highest class first. A full queue or an
+    expired wait sheds the turn so the caller can answer "busy" at once.
+    """
+
+    def __init__(
+        self,
+        class_concurrency: Dict[str, int] = CLASS_CONCURRENCY,
+        queue_limits: Dict[str, int] = CLASS_QUEUE_LIMITS,
+        max_wait_seconds: Dict[str, float] = CLASS_MAX_WAIT_SECONDS
+    ):
+        self.class_concurrency = class_concurrency
+        self.queue_limits = queue_limits
+        self.max_wait_seconds = max_wait_seconds
+
+        self._active = 0
+        self._queues = {cls: deque() for cls in PRIORITY_CLASSES}
+        self._cond = threading.Condition()
+        self._metrics = {
+            cls: {
+                "admitted": 0,
+                "shed_queue_full": 0,
+                "shed_timeout": 0,
+                "max_queue_depth": 0,
+                "wait_ms": deque(maxlen=1000)
+            }
+            for cls in PRIORITY_CLASSES
+        }
+
+    def _head_of_line(self, priority: str, ticket) -> bool:
+        """True if the ticket is first in line across its class and all higher ones."""
+        for cls in PRIORITY_CLASSES:
+            if self._queues[cls]:
+                return cls == priority and self._queues[cls][0] is ticket
+            if cls == priority:
+                return ticket is None
+        return ticket is None
+
+    def _acquire(self, priority: str) -> bool:
+        """Wait for a slot; False means the turn was shed."""
+        metrics = self._metrics[priority]
+        start = time.perf_counter()
+
+        with self._cond:
+            if self._active < self.class_concurrency[priority] and self._head_of_line(priority, None):
+                self._active += 1
+                metrics["admitted"] += 1
+                metrics["wait_ms"].append(0.0)
+                return True
+
+            queue = self._queues[priority]
+            if len(queue) >= self.queue_limits[priority]:
+                metrics["shed_queue_full"] += 1
+                return False
+
+            ticket = object()
+            queue.append(ticket)
+            metrics["max_queue_depth"] = max(metrics["max_queue_depth"], len(queue))
+            deadline = start + self.max_wait_seconds[priority]
+
+            while not (
+                self._active < self.class_concurrency[priority]
+                and self._head_of_line(priority, ticket)
+            ):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    queue.remove(ticket)
+                    metrics["shed_timeout"] += 1
+                    self._cond.notify_all()  # Those behind may now be head of line
+                    return False
+                self._cond.wait(remaining)
+
+            queue.popleft()
+            self._active += 1
+            metrics["admitted"] += 1
+            metrics["wait_ms"].append((time.perf_counter() - start) * 1000)
+            self._cond.notify_all()  # Next in line may also fit
+            return True
+
+    def _release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def run(self, priority: str, func, *args, **kwargs) -> Tuple[bool, Any]:
+        """
+        Run func under admission control.
+
+        Args:
+            priority: One of PRIORITY_CLASSES
+            func: Work to run once admitted
+            *args, **kwargs: Passed to func
+
+        Returns:
+            (True, result) if admitted, (False, None) if the turn was shed
+        """
+        if not self._acquire(priority):
+            logger.warning(f"Shed {priority} turn under load")
+            return False, None
+        try:
+            return True, func(*args, **kwargs)
+        finally:
+            self._release()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-class counters, current queue depth and wait percentiles."""
+        with self._cond:
+            report = {"active": self._active}
+            for cls in PRIORITY_CLASSES:
+                metrics = self._metrics[cls]
+                waits = sorted(metrics["wait_ms"])
+                report[cls] = {
+                    "admitted": metrics["admitted"],
+                    "shed_queue_full": metrics["shed_queue_full"],
+                    "shed_timeout": metrics["shed_timeout"],
+                    "queue_depth": len(self._queues[cls]),
+                    "max_queue_depth": metrics["max_queue_depth"],
+                    "wait_ms_p50": round(waits[len(waits) // 2], 1) if waits else 0.0,
+                    "wait_ms_p95": round(waits[int(len(waits) * 0.95)], 1) if waits else 0.0
+                }
+            return report
+
+
+admission_controller = AdmissionController()
+
+
+def handle_turn(
+    user_id: str,
+    session_id: str,
+    user_input: str,
+    priority: Optional[str] = None
+) -> str:
+    """
+    Entry point for a student turn: fast path, else classify, admit, then run.
+
+    Args:
+        user_id: Student identifier
+        session_id: Session identifier
+        user_input: Student message
+        priority: Override the detected class (e.g. "bulk" for batch jobs)
+
+    Returns:
+        Agent response, or a fast busy reply if the turn was shed
+    """
+    # Structured commands are answered in milliseconds without an agent turn
+    response_text = try_fast_path(user_id, session_id, user_input)
+    if response_text is not None:
+        return response_text
+
+    priority = priority or classify_priority(user_input)
+    admitted, response_text = admission_controller.run(
+        priority, run_turn, user_id, session_id, user_input
+    )
+    if admitted:
+        return response_text
+    return WELLNESS_BUSY_REPLY if priority == "wellness" else BUSY_REPLY
+
 # ============================================================================
 # MAIN EXECUTION FUNCTION
 # ============================================================================
 
-def run_interactive_session():
+STUDENT_PROFILE_PATH = os.getenv(
+    "STUDENT_PROFILE_PATH", os.path.join(os.path.expanduser("~"), ".eduassist", "profile.json")
+)
+
+
+def load_student_id() -> str:
+    """
+    Return the CLI student's stable id so memories and logs follow them across runs.
+
+    Uses STUDENT_ID if set, otherwise the id saved in the local profile,
+    creating the profile on first run.
+
+    Returns:
+        Student id
+    """
+    if os.getenv("STUDENT_ID"):
+        return os.getenv("STUDENT_ID")
+
+    try:
+        with open(STUDENT_PROFILE_PATH, encoding="utf-8") as f:
+            return json.load(f)["student_id"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    student_id = "student_" + str(uuid.uuid4())[:8]
+    try:
+        os.makedirs(os.path.dirname(STUDENT_PROFILE_PATH), exist_ok=True)
+        with open(STUDENT_PROFILE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"student_id": student_id, "created_at": datetime.now().isoformat()}, f)
+    except OSError as e:
+        logger.warning(f"Could not save student profile: {e}")
+    return student_id
+
+
+def run_interactive_session(user_id: Optional[str] = None, session_id: Optional[str] = None):
     """
     Run an interactive CLI session with the EduAssist AI agent system.
+
+    Args:
+        user_id: Student id, defaults to the stable local student (see load_student_id)
+        session_id: Session to resume; a new session is started if it was never logged
     """
-    import uuid
-    
     print("=" * 70)
     print("🎓 Welcome to EduAssist AI - Multi-Agent Educational Support System")
     print("=" * 70)
@@ -639,21 +2850,26 @@ def run_interactive_session():
     print()
     
     # Create session
-    user_id = "student_" + str(uuid.uuid4())[:8]
-    session_id = "session_" + str(uuid.uuid4())[:8]
+    user_id = user_id or load_student_id()
+    session_id = session_id or "session_" + str(uuid.uuid4())[:8]
     
     # Initialize session state with user preferences
-    initial_state = {
-        "user_preferences": {
-            "learning_style": "visual_and_textual",
-            "difficulty_level": "intermediate",
-            "interests": ["computer_science", "mathematics"]
-        },
-        "interaction_count": 0,
-        "study_schedules": [],
-        "progress_tracking": {},
-        "wellness_history": []
-    }
+    initial_state = session_event_log.load(user_id, session_id)
+    if initial_state is not None:
+        logger.info(f"Recovered session state from event log: {session_id}")
+    else:
+        initial_state = {
+            "user_preferences": {
+                "learning_style": "visual_and_textual",
+                "difficulty_level": "intermediate",
+                "interests": ["computer_science", "mathematics"]
+            },
+            "interaction_count": 0,
+            "study_schedules": [],
+            "progress_tracking": {},
+            "wellness_history": []
+        }
+        session_event_log.append(user_id, session_id, "session_created", initial_state)
     
     session_service.create_session(
         app_name="eduassist_ai",
@@ -685,27 +2901,12 @@ def run_interactive_session():
                 print("  • Help me understand recursion with examples")
                 continue
             
-            # Create message content
-            message = content_types.Content(
-                role="user",
-                parts=[user_input]
-            )
-            
             # Run agent
             print("\n🤖 EduAssist AI: ", end="", flush=True)
-            
-            response = runner.run(
-                user_id=user_id,
-                session_id=session_id,
-                content=message
-            )
-            
-            # Extract and print response
-            for event in response.events:
-                if event.type == "content" and event.content.role == "agent":
-                    response_text = event.content.parts[0].text
-                    print(response_text)
-            
+
+            response_text = handle_turn(user_id, session_id, user_input)
+            print(response_text)
+
             # Update interaction count
             session = session_service.get_session(
                 app_name="eduassist_ai",
@@ -732,7 +2933,9 @@ if __name__ == "__main__":
         exit(1)
     
     try:
-        run_interactive_session()
+        memory_bank.preload()
+        educator_analytics.rebuild_from_log(session_event_log)
+        run_interactive_session(session_id=os.getenv("RESUME_SESSION_ID"))
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
         print(f"\n❌ Fatal error: {e}")
@@ -0,0 +1,34 @@
+"""
+Shared fixtures for the EduAssist AI test suite.
+
+complete-implementation.py is a script with a hyphenated name, so it is
+loaded by path. Its on-disk stores are pointed at a temporary directory
+before loading.
+"""
+
+import importlib.util
+import os
+import pathlib
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    """The loaded complete_implementation module."""
+    pytest.importorskip("google.adk")
+    pytest.importorskip("numpy")
+
+    data_dir = tmp_path_factory.mktemp("eduassist")
+    os.environ["MEMORY_BANK_DIR"] = str(data_dir / "memory_bank")
+    os.environ["SESSION_LOG_DIR"] = str(data_dir / "session_logs")
+    os.environ["STUDENT_PROFILE_PATH"] = str(data_dir / "profile.json")
+
+    spec = importlib.util.spec_from_file_location(
+        "complete_implementation", ROOT / "complete-implementation.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,105 @@
+"""Tests for priority admission control and load shedding."""
+
+import threading
+import time
+
+import pytest
+
+
+def _controller(app, concurrency=1, queue_limit=10, max_wait=5.0):
+    return app.AdmissionController(
+        class_concurrency={cls: concurrency for cls in app.PRIORITY_CLASSES},
+        queue_limits={cls: queue_limit for cls in app.PRIORITY_CLASSES},
+        max_wait_seconds={cls: max_wait for cls in app.PRIORITY_CLASSES}
+    )
+
+
+def _hold_slot(controller, priority="interactive"):
+    """Occupy one slot until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+
+    thread = threading.Thread(target=controller.run, args=(priority, work))
+    thread.start()
+    assert started.wait(5)
+    return release, thread
+
+
+def _wait_for_queue(controller, priority, depth):
+    deadline = time.time() + 5
+    while controller.get_metrics()[priority]["queue_depth"] < depth:
+        assert time.time() < deadline, f"{priority} queue never reached {depth}"
+        time.sleep(0.005)
+
+
+def test_queued_turns_are_released_highest_class_first(app):
+    controller = _controller(app)
+    release, holder = _hold_slot(controller)
+
+    order = []
+    threads = []
+    for priority in ["bulk", "interactive", "wellness"]:
+        thread = threading.Thread(target=controller.run, args=(priority, order.append, priority))
+        thread.start()
+        threads.append(thread)
+        _wait_for_queue(controller, priority, 1)
+
+    release.set()
+    for thread in [holder] + threads:
+        thread.join(5)
+    assert order == ["wellness", "interactive", "bulk"]
+
+
+def test_wellness_uses_slots_reserved_from_lower_classes(app):
+    controller = app.AdmissionController(
+        class_concurrency={"wellness": 2, "interactive": 1, "bulk": 1},
+        queue_limits={cls: 10 for cls in app.PRIORITY_CLASSES},
+        max_wait_seconds={cls: 5.0 for cls in app.PRIORITY_CLASSES}
+    )
+    release, holder = _hold_slot(controller)
+
+    assert controller.run("wellness", lambda: "ok") == (True, "ok")
+    release.set()
+    holder.join(5)
+
+
+def test_full_queue_sheds_immediately(app):
+    controller = _controller(app, queue_limit=1)
+    release, holder = _hold_slot(controller)
+    queued = threading.Thread(target=controller.run, args=("bulk", lambda: None))
+    queued.start()
+    _wait_for_queue(controller, "bulk", 1)
+
+    start = time.perf_counter()
+    assert controller.run("bulk", lambda: "never") == (False, None)
+    assert time.perf_counter() - start < 0.5
+    assert controller.get_metrics()["bulk"]["shed_queue_full"] == 1
+
+    release.set()
+    for thread in [holder, queued]:
+        thread.join(5)
+
+
+def test_expired_wait_sheds_the_turn(app):
+    controller = _controller(app, max_wait=0.05)
+    release, holder = _hold_slot(controller)
+
+    assert controller.run("bulk", lambda: "never") == (False, None)
+    assert controller.get_metrics()["bulk"]["shed_timeout"] == 1
+
+    release.set()
+    holder.join(5)
+
+
+@pytest.mark.parametrize("message, reply_name", [
+    ("I feel hopeless about everything", "WELLNESS_BUSY_REPLY"),
+    ("Recommend a tutorial for SQL", "BUSY_REPLY"),
+])
+def test_shed_turn_gets_a_busy_reply(app, monkeypatch, message, reply_name):
+    monkeypatch.setattr(app, "admission_controller", _controller(app, queue_limit=0, concurrency=0))
+    monkeypatch.setattr(app, "run_turn", lambda *args: pytest.fail("shed turn was run"))
+
+    assert app.handle_turn("alice", "s1", message) == getattr(app, reply_name)
@@ -0,0 +1,33 @@
+"""Tests for rebuilding the educator analytics views after a restart."""
+
+from types import SimpleNamespace
+
+
+def _context(app, user_id, session_id, cohort_id=None):
+    app.session_event_log.append(user_id, session_id, "session_created", {"cohort_id": cohort_id})
+    state = {"user_id": user_id, "session_id": session_id, "cohort_id": cohort_id}
+    return SimpleNamespace(state=state)
+
+
+def test_views_are_rebuilt_from_the_session_log(app, tmp_path, monkeypatch):
+    log = app.SessionEventLog(str(tmp_path), snapshot_every=3)
+    live = app.EducatorAnalytics()
+    monkeypatch.setattr(app, "session_event_log", log)
+    monkeypatch.setattr(app, "educator_analytics", live)
+
+    alice = _context(app, "alice", "s1", cohort_id="cs101")
+    bob = _context(app, "bob", "s2", cohort_id="cs101")
+    app.track_progress("recursion", "blocked", tool_context=alice)
+    app.track_progress("graphs", "completed", tool_context=alice)
+    app.track_progress("recursion", "in_progress", tool_context=alice)
+    app.track_progress("recursion", "blocked", tool_context=bob)
+    app._store_wellness({"overall_status": "good", "wellness_score": 80, "assessed_at": "1"}, alice)
+    app._store_wellness({"overall_status": "critical", "wellness_score": 20, "assessed_at": "2"}, alice)
+
+    restarted = app.EducatorAnalytics()
+    assert restarted.rebuild_from_log(app.SessionEventLog(str(tmp_path))) == 2
+
+    for cohort in [app.ALL_STUDENTS, "cs101"]:
+        assert restarted.cohort_summary(cohort) == live.cohort_summary(cohort)
+    assert restarted.blocked_hotspots() == [{"task_id": "recursion", "blocked_students": 1}]
+    assert restarted.wellness_breakdown()["counts"]["critical"] == 1
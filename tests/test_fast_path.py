@@ -0,0 +1,72 @@
+"""Tests for the deterministic fast path grammar."""
+
+import itertools
+
+import pytest
+
+_sessions = itertools.count()
+
+
+@pytest.fixture
+def session(app):
+    """A fresh session with one tracked task; returns (user_id, session_id, state)."""
+    user_id, session_id = "fast_path_student", f"fast_path_{next(_sessions)}"
+    state = {
+        "progress_tracking": {
+            "linear_algebra": {
+                "task_id": "linear_algebra", "status": "in_progress", "notes": "",
+                "timestamp": "2025-11-01T10:00:00", "completion_percentage": 50
+            }
+        },
+        "study_schedules": [],
+        "wellness_history": []
+    }
+    app.session_service.create_session(
+        app_name="eduassist_ai", user_id=user_id, session_id=session_id, state=state
+    )
+    session = app.session_service.get_session(
+        app_name="eduassist_ai", user_id=user_id, session_id=session_id
+    )
+    return user_id, session_id, session.state
+
+
+@pytest.mark.parametrize("message, task_id, status", [
+    ("mark recursion as done", "recursion", "completed"),
+    ("Please mark Dynamic Programming as in progress.", "dynamic_programming", "in_progress"),
+    ("mark intro to python as stuck", "intro_to_python", "blocked"),
+    ("can you mark c++ pointers to completed", "c++_pointers", "completed"),
+    ("mark Linear Algebra as finished", "linear_algebra", "completed"),
+    ("mark recursion done", "recursion", "completed"),
+    ("mark recursion completed", "recursion", "completed"),
+    ("Mark Recursion Complete.", "recursion", "completed"),
+])
+def test_mark_commands_update_progress(app, session, message, task_id, status):
+    user_id, session_id, state = session
+    reply = app.try_fast_path(user_id, session_id, message)
+
+    assert reply is not None and task_id in reply
+    assert state["progress_tracking"][task_id]["status"] == status
+
+
+@pytest.mark.parametrize("message", [
+    "set up a plan for when i'm stuck",
+    "set recursion as done",
+    "mark it as done",
+    "mark this as complete",
+    "mark my essay as done",
+    "mark the essay I wrote for history class as done",
+    "I'm stuck on recursion",
+    "how do I mark a task as completed",
+])
+def test_ordinary_sentences_go_to_the_agents(app, session, message):
+    user_id, session_id, state = session
+    before = dict(state["progress_tracking"])
+
+    assert app.try_fast_path(user_id, session_id, message) is None
+    assert state["progress_tracking"] == before
+
+
+def test_show_progress_and_schedules(app, session):
+    user_id, session_id, _ = session
+    assert "linear_algebra: in progress" in app.try_fast_path(user_id, session_id, "show my progress")
+    assert "don't have any study schedules" in app.try_fast_path(user_id, session_id, "list my schedules")
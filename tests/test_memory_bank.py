@@ -0,0 +1,100 @@
+"""Tests for the Memory Bank: persistence, crash recovery and indexing."""
+
+import os
+
+import numpy as np
+
+
+def test_reload_recalls_memories_from_an_earlier_run(app, tmp_path):
+    bank = app.MemoryBank(str(tmp_path))
+    bank.add("alice", "Struggled with recursion base cases", kind="progress")
+    bank.add("alice", "Feels anxious before the calculus exam", kind="wellness")
+    bank.add("bob", "Asked about recursion in Haskell")
+
+    reloaded = app.MemoryBank(str(tmp_path))
+    assert len(reloaded) == 3
+
+    results = reloaded.search("alice", "recursion base case", k=1)
+    assert results[0]["text"] == "Struggled with recursion base cases"
+    assert results[0]["kind"] == "progress"
+    assert all(r["user_id"] == "bob" for r in reloaded.search("bob", "recursion"))
+
+
+def test_torn_write_is_truncated_and_rows_stay_aligned(app, tmp_path):
+    bank = app.MemoryBank(str(tmp_path))
+    bank.add("alice", "Photosynthesis converts light into chemical energy")
+
+    # Crash after the record line was written but before its vector and row
+    with open(tmp_path / "records.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"user_id": "alice", "kind": "interaction", "text": "lost"}\n')
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(np.ones(bank.dim // 2, dtype=np.float32).tobytes())
+
+    reloaded = app.MemoryBank(str(tmp_path))
+    assert len(reloaded) == 1
+    assert os.path.getsize(tmp_path / "vectors.f32") == bank.dim * 4
+
+    reloaded.add("alice", "Mitochondria are the powerhouse of the cell")
+    again = app.MemoryBank(str(tmp_path))
+    for query, text in [
+        ("photosynthesis light energy", "Photosynthesis converts light into chemical energy"),
+        ("mitochondria powerhouse cell", "Mitochondria are the powerhouse of the cell"),
+    ]:
+        top = again.search("alice", query, k=1)[0]
+        assert top["text"] == text
+        assert top["score"] <= 1.0
+
+
+def test_bank_is_loaded_lazily(app, tmp_path):
+    directory = tmp_path / "bank"
+    bank = app.MemoryBank(str(directory))
+    assert not directory.exists()
+
+    assert bank.search("alice", "anything") == []
+    assert directory.exists()
+
+
+def test_trained_index_finds_the_same_memories(app, tmp_path):
+    bank = app.MemoryBank(str(tmp_path), n_lists=4, n_probe=4, train_size=10**9)
+    topics = ["algebra equations", "cell biology", "french verbs", "world war history"]
+    for i in range(3000):
+        bank.add("alice", f"{topics[i % 4]} note {i}")
+    bank.train()
+    assert bank.centroids is not None
+
+    exact = app.MemoryBank(str(tmp_path))  # Saved centroids are re-indexed in the background
+    assert bank.search("alice", "cell biology", k=3)[0]["text"].startswith("cell biology")
+    assert exact.search("alice", "cell biology", k=3)[0]["text"].startswith("cell biology")
+
+
+def test_cli_student_id_is_stable_across_runs(app, monkeypatch, tmp_path):
+    monkeypatch.delenv("STUDENT_ID", raising=False)
+    monkeypatch.setattr(app, "STUDENT_PROFILE_PATH", str(tmp_path / "profile.json"))
+    first = app.load_student_id()
+    assert first.startswith("student_")
+    assert app.load_student_id() == first
+
+    monkeypatch.setenv("STUDENT_ID", "student_fixed")
+    assert app.load_student_id() == "student_fixed"
+
+
+def test_files_and_records_are_read_without_the_search_lock(app, tmp_path, monkeypatch):
+    app.MemoryBank(str(tmp_path)).add("alice", "Binary search halves the interval")
+    bank = app.MemoryBank(str(tmp_path))
+
+    real_read_array, real_read_records = app._read_array, bank._read_records
+
+    def read_array(*args):
+        assert not bank._lock.locked()
+        return real_read_array(*args)
+
+    def read_records(*args):
+        assert not bank._lock.locked()
+        return real_read_records(*args)
+
+    monkeypatch.setattr(app, "_read_array", read_array)
+    monkeypatch.setattr(bank, "_read_records", read_records)
+
+    bank.preload()
+    results = bank.search("alice", "binary search")
+    assert results[0]["text"] == "Binary search halves the interval"
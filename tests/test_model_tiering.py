@@ -0,0 +1,93 @@
+"""Tests for adaptive model tiering and answer escalation."""
+
+import asyncio
+from types import SimpleNamespace
+
+
+def _response(text=None, function_call=None):
+    return SimpleNamespace(content=SimpleNamespace(
+        parts=[SimpleNamespace(text=text, function_call=function_call)]
+    ))
+
+
+class FakeLlm:
+    def __init__(self, model, calls, reply):
+        self.model, self.calls, self.reply = model, calls, reply
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls.append(llm_request.model)
+        yield self.reply
+
+
+def _context(agent_name, query="explain recursion"):
+    return SimpleNamespace(
+        agent_name=agent_name,
+        invocation_id="inv-1",
+        state={"current_query": query}
+    )
+
+
+def test_escalation_re_asks_only_the_rejected_call(app, monkeypatch):
+    calls = []
+    good = _response("Recursion is when a function calls itself on a smaller input.")
+    monkeypatch.setattr(app.LLMRegistry, "new_llm", lambda model: FakeLlm(model, calls, good))
+
+    ctx = _context("learning_assistant_agent")
+    request = SimpleNamespace(model=None)
+    app.model_tier_callback(ctx, request)
+    assert request.model == app.MODEL_TIERS["standard"]
+
+    result = asyncio.run(app.model_escalation_callback(ctx, _response("short")))
+
+    assert result is good
+    assert calls == [app.MODEL_TIERS["pro"]]
+    assert ctx.state["last_model_tier"] == "pro"
+
+
+def test_valid_answers_and_tool_calls_are_not_escalated(app, monkeypatch):
+    calls = []
+    monkeypatch.setattr(app.LLMRegistry, "new_llm", lambda model: FakeLlm(model, calls, None))
+
+    ctx = _context("learning_assistant_agent")
+    app.model_tier_callback(ctx, SimpleNamespace(model=None))
+    ok = _response("A complete answer that is comfortably long enough to pass.")
+    assert asyncio.run(app.model_escalation_callback(ctx, ok)) is None
+
+    app.model_tier_callback(ctx, SimpleNamespace(model=None))
+    tool_call = _response(function_call={"name": "track_progress"})
+    assert asyncio.run(app.model_escalation_callback(ctx, tool_call)) is None
+    assert calls == []
+
+
+def test_decisions_do_not_store_the_message_and_replay(app, tmp_path):
+    app.model_decision_log.clear()
+    app.model_tier_callback(_context("wellness_coach_agent", "I feel hopeless"), SimpleNamespace(model=None))
+
+    path = tmp_path / "decisions.jsonl"
+    assert app.export_model_decisions(str(path)) == 1
+    assert "hopeless" not in path.read_text()
+
+    summary = app.replay_model_decisions(str(path), slo_ms=100)
+    assert summary["decisions"] == 1
+    assert summary["replayed_tiers"]["standard"] == 1
+
+
+class FailingLlm:
+    def __init__(self, model):
+        self.model = model
+
+    async def generate_content_async(self, llm_request, stream=False):
+        raise RuntimeError("429 quota exceeded")
+        yield  # pragma: no cover
+
+
+def test_failed_escalation_keeps_the_original_answer(app, monkeypatch):
+    monkeypatch.setattr(app.LLMRegistry, "new_llm", FailingLlm)
+    app.model_decision_log.clear()
+
+    ctx = _context("learning_assistant_agent")
+    app.model_tier_callback(ctx, SimpleNamespace(model=None))
+    assert asyncio.run(app.model_escalation_callback(ctx, _response("short"))) is None
+
+    assert ctx.state["last_model_tier"] == "standard"
+    assert "quota exceeded" in app.model_decision_log[-1]["error"]
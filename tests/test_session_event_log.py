@@ -0,0 +1,86 @@
+"""Tests for the event-sourced session log: recovery, segments and replay."""
+
+import json
+import os
+
+
+def _progress(task_id, status):
+    return {"task_id": task_id, "status": status, "timestamp": task_id}
+
+
+def _segment_ranges(directory):
+    segments = sorted(os.listdir(os.path.join(directory, "segments")))
+    ranges = []
+    for name in segments:
+        with open(os.path.join(directory, "segments", name), encoding="utf-8") as f:
+            seqs = [json.loads(line)["seq"] for line in f]
+        ranges.append((name, seqs[0], seqs[-1]))
+    return ranges
+
+
+def test_recovery_restores_snapshot_plus_tail(app, tmp_path):
+    log = app.SessionEventLog(str(tmp_path), snapshot_every=4)
+    log.append("alice", "s1", "session_created", {"interaction_count": 0})
+    for i in range(6):
+        log.append("alice", "s1", "progress_updated", _progress(f"task{i}", "completed"))
+    log.append("alice", "s1", "wellness_assessed", {"overall_status": "good"})
+
+    restarted = app.SessionEventLog(str(tmp_path), snapshot_every=4)
+    state = restarted.load("alice", "s1")
+    assert sorted(state["progress_tracking"]) == [f"task{i}" for i in range(6)]
+    assert state["wellness_history"] == [{"overall_status": "good"}]
+    assert restarted.load("alice", "never_logged") is None
+
+
+def test_segments_keep_their_true_range_across_restarts(app, tmp_path):
+    log = app.SessionEventLog(str(tmp_path), snapshot_every=5)
+    for i in range(7):  # Snapshot at 5; events 6-7 left in the tail
+        log.append("alice", "s1", "progress_updated", _progress(f"t{i}", "in_progress"))
+
+    restarted = app.SessionEventLog(str(tmp_path), snapshot_every=5)
+    for i in range(7, 10):  # Snapshot at 10 must roll events 6-10
+        restarted.append("alice", "s1", "progress_updated", _progress(f"t{i}", "in_progress"))
+
+    session_dir = restarted._session_dir("alice", "s1")
+    for name, first, last in _segment_ranges(session_dir):
+        assert name == f"events-{first:08d}-{last:08d}.jsonl"
+    assert [r[1:] for r in _segment_ranges(session_dir)] == [(1, 5), (6, 10)]
+
+
+def test_replay_matches_recovered_state(app, tmp_path):
+    log = app.SessionEventLog(str(tmp_path), snapshot_every=3)
+    log.append("alice", "s1", "session_created", {"study_schedules": []})
+    log.append("alice", "s1", "schedule_created", {"subject": "Algebra"})
+    for status in ["not_started", "in_progress", "completed"]:
+        log.append("alice", "s1", "progress_updated", _progress("algebra", status))
+
+    replayed = list(log.replay("alice", "s1"))
+    assert [event["seq"] for event, _ in replayed] == [1, 2, 3, 4, 5]
+    assert replayed[-1][1] == log.load("alice", "s1")
+    assert replayed[-1][1]["progress_tracking"]["algebra"]["status"] == "completed"
+
+
+def test_torn_tail_is_dropped_and_appends_continue(app, tmp_path):
+    log = app.SessionEventLog(str(tmp_path), snapshot_every=100)
+    log.append("alice", "s1", "progress_updated", _progress("a", "completed"))
+    tail_path = os.path.join(log._session_dir("alice", "s1"), "events.jsonl")
+    with open(tail_path, "a", encoding="utf-8") as f:
+        f.write('{"seq": 2, "type": "progress_upd')  # Crash mid-write
+
+    restarted = app.SessionEventLog(str(tmp_path), snapshot_every=100)
+    assert restarted.append("alice", "s1", "progress_updated", _progress("b", "blocked")) == 2
+
+    again = app.SessionEventLog(str(tmp_path), snapshot_every=100)
+    assert sorted(again.load("alice", "s1")["progress_tracking"]) == ["a", "b"]
+
+
+def test_only_recent_sessions_stay_in_memory(app, tmp_path):
+    log = app.SessionEventLog(str(tmp_path), snapshot_every=3, max_cached_sessions=2)
+    for session_id in ["s1", "s2", "s3"]:
+        log.append("alice", session_id, "progress_updated", _progress(session_id, "completed"))
+    assert len(log._states) == 2
+
+    # The evicted session is recovered from disk and keeps its sequence numbers
+    assert log.append("alice", "s1", "progress_updated", _progress("more", "blocked")) == 2
+    assert sorted(log.load("alice", "s1")["progress_tracking"]) == ["more", "s1"]
+    assert len(log._states) == 2
@@ -0,0 +1,83 @@
+"""Tests for the speculative Memory Bank recall that overlaps routing."""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+
+def test_hit_returns_the_specialists_memories(app, tmp_path, monkeypatch):
+    bank = app.MemoryBank(str(tmp_path))
+    bank.add("alice", "Wellness critical: stress high, sleep poor", kind="wellness")
+    bank.add("alice", "Task stress-management-reading marked completed", kind="progress")
+    monkeypatch.setattr(app, "memory_bank", bank)
+
+    assert app.start_speculation("s1", "alice", "I'm so stressed and anxious") == "wellness_coach_agent"
+    memories = asyncio.run(app.resolve_speculation("s1", "wellness_coach_agent"))
+    app.finish_speculation("s1")
+
+    assert memories and all("progress" not in line for line in memories)
+    assert memories == app.recall_memories(
+        "alice", "I'm so stressed and anxious", kinds=["wellness", "interaction"]
+    )
+
+
+def test_miss_is_discarded_and_overlap_is_not_overstated(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "memory_bank", app.MemoryBank(str(tmp_path)))
+    release = threading.Event()
+    real_recall = app.recall_memories
+
+    def slow_recall(*args, **kwargs):
+        release.wait(5)
+        return real_recall(*args, **kwargs)
+
+    monkeypatch.setattr(app, "recall_memories", slow_recall)
+    before = app.get_speculation_stats()
+
+    app.start_speculation("s2", "alice", "I'm so stressed")
+    assert asyncio.run(app.resolve_speculation("s2", "study_planner_agent")) is None
+    release.set()
+    app.finish_speculation("s2")  # The wellness coach never asked
+    assert app.get_speculation_stats()["misses"] == before["misses"] + 1
+
+    release.clear()
+    before = app.get_speculation_stats()
+    app.start_speculation("s3", "alice", "I'm so stressed")
+    threading.Timer(0.05, release.set).start()
+    assert asyncio.run(app.resolve_speculation("s3", "wellness_coach_agent")) == []
+    app.finish_speculation("s3")
+
+    # The specialist waited for the whole recall, so almost nothing was overlapped
+    after = app.get_speculation_stats()
+    assert after["hits"] == before["hits"] + 1
+    assert after["waited_ms"] - before["waited_ms"] >= 40
+    assert after["overlapped_ms"] - before["overlapped_ms"] < 10
+
+
+class _Request:
+    def __init__(self):
+        self.model, self.instructions = None, []
+
+    def append_instructions(self, instructions):
+        self.instructions.extend(instructions)
+
+
+def test_prefetch_waits_for_the_predicted_specialist(app, tmp_path, monkeypatch):
+    bank = app.MemoryBank(str(tmp_path))
+    bank.add("alice", "Task recursion marked blocked", kind="progress")
+    monkeypatch.setattr(app, "memory_bank", bank)
+    query = "explain recursion and make a study plan"
+    state = {"user_id": "alice", "speculation_id": "s4", "current_query": query, "recalled_memories": {}}
+    before = app.get_speculation_stats()
+
+    assert app.start_speculation("s4", "alice", query) == "study_planner_agent"
+    for agent_name in ["learning_assistant_agent", "study_planner_agent", "study_planner_agent"]:
+        context = SimpleNamespace(agent_name=agent_name, invocation_id="inv-4", state=state)
+        request = _Request()
+        asyncio.run(app.specialist_model_callback(context, request))
+        assert any("recursion marked blocked" in line for line in request.instructions)
+    app.finish_speculation("s4")
+
+    after = app.get_speculation_stats()
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
+    assert set(state["recalled_memories"]) == {"learning_assistant_agent", "study_planner_agent"}
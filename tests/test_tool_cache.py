@@ -0,0 +1,53 @@
+"""Tests for memoized tools."""
+
+from types import SimpleNamespace
+
+
+def test_cache_hit_stores_a_copy_in_session_state(app, monkeypatch):
+    monkeypatch.setattr(app, "tool_result_cache", app.ToolResultCache())
+    context = SimpleNamespace(state={})
+
+    first = app.assess_wellness(7, 5.0, "rarely", tool_context=context)
+    second = app.assess_wellness(7, 5.0, "rarely", tool_context=context)
+
+    history = context.state["wellness_history"]
+    assert len(history) == 2
+    assert history[1] == second and history[1] is not second
+    assert history[0] is not first
+
+    second["recommendations"].append("edited by the model")
+    assert "edited by the model" not in history[1]["recommendations"]
+
+
+def test_lru_eviction_order_and_per_tool_stats(app):
+    cache = app.ToolResultCache(maxsize=2)
+    cache.put("tool_a", "1", {"n": 1})
+    cache.put("tool_b", "2", {"n": 2})
+    assert cache.get("tool_a", "1") == {"n": 1}  # tool_a/1 is now most recent
+
+    cache.put("tool_a", "3", {"n": 3})  # Evicts tool_b/2, the least recently used
+    assert cache.get("tool_b", "2") is None
+    assert cache.get("tool_a", "1") == {"n": 1}
+    assert cache.get("tool_a", "3") == {"n": 3}
+
+    stats = cache.get_stats()
+    assert stats["size"] == 2 and stats["maxsize"] == 2
+    assert stats["tools"]["tool_a"] == {"hits": 3, "misses": 0, "evictions": 0, "hit_rate": 1.0}
+    assert stats["tools"]["tool_b"] == {"hits": 0, "misses": 1, "evictions": 1, "hit_rate": 0.0}
+
+
+def test_cache_hit_restamps_timestamp_fields(app, monkeypatch):
+    monkeypatch.setattr(app, "tool_result_cache", app.ToolResultCache())
+    first = app.create_study_schedule("Algebra", 2, 4, "2025-12-01")
+
+    class Later(app.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2030, 1, 1)
+
+    monkeypatch.setattr(app, "datetime", Later)
+    second = app.create_study_schedule("Algebra", 2, 4, "2025-12-01")
+
+    assert second["created_at"] == "2030-01-01T00:00:00"
+    assert {**second, "created_at": None} == {**first, "created_at": None}
+    assert app.tool_result_cache.get_stats()["tools"]["create_study_schedule"]["hits"] == 1